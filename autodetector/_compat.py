@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict
+
+# dataclass(slots=True) needs Python 3.10; older interpreters keep __dict__
+DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
@@ -102,6 +102,67 @@ class GenerationResult:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+class JsonObjectScanner:
+    """
+    Incremental scan for the end of the first JSON object in generated text.
+    
+    Tracks brace depth outside JSON strings. Only ASCII characters change
+    its state, so text can be fed in arbitrary pieces, e.g. one decoded
+    token at a time.
+    """
+    
+    __slots__ = ("depth", "started", "in_string", "escaped", "complete")
+    
+    def __init__(self):
+        self.depth = 0
+        self.started = self.in_string = self.escaped = self.complete = False
+    
+    def feed(self, text: str) -> int:
+        """Scan the next piece; returns the index just past the closing brace, or -1."""
+        if self.complete:
+            return 0
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == "{":
+                self.depth += 1
+                self.started = True
+            elif not self.started:
+                continue
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    return i + 1
+        return -1
+
+
+def json_object_stopping_criteria(tokenizer: Any) -> Any:
+    """
+    transformers StoppingCriteria that ends generate() once the first JSON
+    object in the new tokens closes, so no decoding is spent past it.
+    """
+    from transformers import StoppingCriteria
+    
+    class StopAtJsonObjectEnd(StoppingCriteria):
+        def __init__(self):
+            self.scanner = JsonObjectScanner()
+        
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            # Called once per decoding step; only the newest token is unseen
+            self.scanner.feed(tokenizer.decode(input_ids[0, -1:], skip_special_tokens=True))
+            return self.scanner.complete
+    
+    return StopAtJsonObjectEnd()
+
+
 @dataclass
 class TrainingExample:
     """Single training example for fine-tuning."""
@@ -124,6 +185,16 @@ class TrainingExample:
 class BaseModelAdapter(ABC):
     """Abstract base class for model adapters."""
     
+    # generate() accepts stop_at_json_end=True and halts decoding itself once
+    # the first JSON object in the output closes
+    stops_at_json_end: bool = False
+    # Closing a generate_stream() generator early also stops decoding, rather
+    # than leaving a backend thread generating up to max_tokens
+    cancellable_stream: bool = False
+    # generate() may run from several threads at once (HTTP backends that
+    # queue requests server-side); in-process models must be called serially
+    thread_safe: bool = False
+    
     def __init__(self, config: ModelConfig):
         self.config = config
         self._model = None
@@ -11,7 +11,7 @@ import time
 from typing import Any, Dict, List, Optional, Generator
 import logging
 
-from .. import BaseModelAdapter, ModelConfig, GenerationResult, ModelArchitecture
+from .. import BaseModelAdapter, ModelConfig, GenerationResult, ModelArchitecture, json_object_stopping_criteria
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,8 @@ class GeminiAdapter(BaseModelAdapter):
     Can handle text, images, and structured data.
     """
     
+    stops_at_json_end = True
+    
     def __init__(self, config: ModelConfig):
         super().__init__(config)
         self._model = None
@@ -133,6 +135,14 @@ class GeminiAdapter(BaseModelAdapter):
             "pad_token_id": self._tokenizer.pad_token_id,
         }
         
+        # End decoding at the close of the first JSON object
+        json_stop = None
+        if kwargs.get("stop_at_json_end"):
+            from transformers import StoppingCriteriaList
+            
+            json_stop = json_object_stopping_criteria(self._tokenizer)
+            gen_kwargs["stopping_criteria"] = StoppingCriteriaList([json_stop])
+        
         # Generate
         start_time = time.time()
         with torch.no_grad():
@@ -147,12 +157,18 @@ class GeminiAdapter(BaseModelAdapter):
         elapsed = end_time - start_time
         tokens_per_second = tokens_generated / elapsed if elapsed > 0 else 0
         
+        # Out of budget unless a stop condition or EOS ended it first
+        stopped = (json_stop is not None and json_stop.scanner.complete) or (
+            tokens_generated > 0 and generated_ids[-1].item() == self._tokenizer.eos_token_id
+        )
+        finish_reason = "length" if tokens_generated >= max_tokens and not stopped else "stop"
+        
         return GenerationResult(
             text=text,
             tokens_generated=tokens_generated,
             tokens_per_second=tokens_per_second,
             prompt_tokens=prompt_tokens,
-            finish_reason="stop",
+            finish_reason=finish_reason,
             model_name=self.config.name,
         )
     
@@ -8,7 +8,7 @@ Uses llama-cpp-python for efficient local inference.
 from __future__ import annotations
 
 import time
-from typing import Any, Dict, List, Optional, Generator
+from typing import Any, Dict, List, Optional, Generator, Tuple
 import logging
 
 from .. import BaseModelAdapter, ModelConfig, GenerationResult, ModelArchitecture
@@ -24,10 +24,16 @@ class GPTAdapter(BaseModelAdapter):
     Examples: Llama 2/3, Mistral, Qwen, Phi, Gemma
     """
     
+    # llama.cpp decodes a streamed completion lazily, one token per pull
+    cancellable_stream = True
+    
     def __init__(self, config: ModelConfig):
         super().__init__(config)
         self._llm = None
         self.architecture = ModelArchitecture.GPT
+        # (prefix, first char after it) -> prefix token ids, or None where
+        # tokenizing the two halves separately was found to differ
+        self._prefix_tokens: Dict[Tuple[str, str], Optional[List[int]]] = {}
     
     def load(self) -> bool:
         """Load the model using llama-cpp-python."""
@@ -76,6 +82,7 @@ class GPTAdapter(BaseModelAdapter):
             # llama-cpp doesn't have explicit unload, just delete reference
             del self._llm
             self._llm = None
+            self._prefix_tokens.clear()
             self._is_loaded = False
             logger.info(f"Model {self.config.name} unloaded")
     
@@ -114,7 +121,7 @@ class GPTAdapter(BaseModelAdapter):
         
         # Generate
         start_time = time.time()
-        result = self._llm(prompt, **gen_params)
+        result = self._llm(self._encode_prompt(prompt, kwargs.get("prompt_prefix")), **gen_params)
         end_time = time.time()
         
         # Extract result
@@ -153,6 +160,7 @@ class GPTAdapter(BaseModelAdapter):
         
         max_tokens = max_tokens or self.config.max_tokens
         temperature = temperature if temperature is not None else self.config.temperature
+        stop_sequences = kwargs.get("stop_sequences") or self.config.stop_sequences
         
         gen_params = {
             "max_tokens": max_tokens,
@@ -160,16 +168,57 @@ class GPTAdapter(BaseModelAdapter):
             "top_p": kwargs.get("top_p", self.config.top_p),
             "top_k": kwargs.get("top_k", self.config.top_k),
             "repeat_penalty": kwargs.get("repeat_penalty", self.config.repetition_penalty),
+            "stop": stop_sequences,
             "stream": True,
         }
         
+        # Same custom params as generate()
+        for key, value in self.config.custom_params.items():
+            if key not in gen_params:
+                gen_params[key] = value
+        
         # Stream generation
-        for chunk in self._llm(prompt, **gen_params):
+        for chunk in self._llm(self._encode_prompt(prompt, kwargs.get("prompt_prefix")), **gen_params):
             if "choices" in chunk and len(chunk["choices"]) > 0:
                 delta = chunk["choices"][0].get("text", "")
                 if delta:
                     yield delta
     
+    def _encode_prompt(self, prompt: str, prompt_prefix: Optional[str] = None) -> Any:
+        """
+        Pre-tokenize a prompt that starts with a known static prefix.
+        
+        The prefix's token ids are computed once and cached, so only the
+        per-request remainder is tokenized; other prompts pass through as text.
+        
+        Splitting is only safe where tokenization cannot merge across the
+        split, so the prefix must end on a newline, and the first time a
+        prefix is seen followed by a given character the split ids are
+        checked against tokenizing the whole prompt. If they differ (BPE
+        merges across the boundary, or an SPM vocabulary adding a leading
+        space to the separately tokenized remainder), that combination is
+        always tokenized as one text.
+        """
+        if not prompt_prefix or not prompt_prefix.endswith("\n") or not prompt.startswith(prompt_prefix):
+            return prompt
+        
+        suffix = prompt[len(prompt_prefix):]
+        key = (prompt_prefix, suffix[:1])
+        if key in self._prefix_tokens:
+            prefix_ids = self._prefix_tokens[key]
+            if prefix_ids is None:
+                return prompt
+            return prefix_ids + self._llm.tokenize(suffix.encode("utf-8"), add_bos=False)
+        
+        full_ids = self._llm.tokenize(prompt.encode("utf-8"))
+        prefix_ids = self._llm.tokenize(prompt_prefix.encode("utf-8"))
+        split_ids = prefix_ids + self._llm.tokenize(suffix.encode("utf-8"), add_bos=False)
+        if split_ids != full_ids:
+            logger.debug("Prompt prefix does not end on a token boundary; tokenizing prompts whole")
+            prefix_ids = None
+        self._prefix_tokens[key] = prefix_ids
+        return full_ids
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information."""
         if not self._is_loaded or self._llm is None:
@@ -193,6 +242,12 @@ class GPTAdapter(BaseModelAdapter):
             raise RuntimeError("Model not loaded")
         return self._llm.tokenize(text.encode("utf-8"))
     
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text, without the BOS token tokenize() prepends."""
+        if not self._is_loaded or self._llm is None:
+            raise RuntimeError("Model not loaded")
+        return len(self._llm.tokenize(text.encode("utf-8"), add_bos=False))
+    
     def detokenize(self, tokens: List[int]) -> str:
         """Convert token IDs back to text."""
         if not self._is_loaded or self._llm is None:
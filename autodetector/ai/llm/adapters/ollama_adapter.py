@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Generator, List, Optional
 import logging
 
@@ -23,6 +24,11 @@ logger = logging.getLogger(__name__)
 class OllamaAdapter(BaseModelAdapter):
     """Adapter for Ollama HTTP API."""
 
+    # Closing a stream drops the HTTP connection, which aborts the request
+    cancellable_stream = True
+    # Each call is an independent HTTP request; the server queues them
+    thread_safe = True
+
     def __init__(self, config: ModelConfig):
         super().__init__(config)
         self.architecture = ModelArchitecture.OLLAMA
@@ -121,6 +127,30 @@ class OllamaAdapter(BaseModelAdapter):
             },
         )
 
+    def generate_batch(
+        self,
+        prompts: List[str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> List[GenerationResult]:
+        """
+        Generate several prompts as concurrent requests, results in order.
+
+        The server decodes up to OLLAMA_NUM_PARALLEL requests per model in one
+        batch; set custom_params["num_parallel"] to match it (default 4).
+        """
+        if not prompts:
+            return []
+
+        num_parallel = int((self.config.custom_params or {}).get("num_parallel", 4))
+        with ThreadPoolExecutor(max_workers=max(1, min(num_parallel, len(prompts)))) as pool:
+            futures = [
+                pool.submit(self.generate, prompt, max_tokens, temperature, **kwargs)
+                for prompt in prompts
+            ]
+            return [future.result() for future in futures]
+
     def generate_stream(
         self,
         prompt: str,
@@ -133,6 +163,7 @@ class OllamaAdapter(BaseModelAdapter):
 
         max_tokens = max_tokens or self.config.max_tokens
         temperature = temperature if temperature is not None else self.config.temperature
+        stop_sequences = kwargs.get("stop_sequences") or self.config.stop_sequences
 
         payload: Dict[str, Any] = {
             "model": self._model_name,
@@ -146,6 +177,9 @@ class OllamaAdapter(BaseModelAdapter):
             },
         }
 
+        if stop_sequences:
+            payload["options"]["stop"] = stop_sequences
+
         with requests.post(
             f"{self._base_url}/api/generate",
             json=payload,
@@ -8,16 +8,251 @@ including alert patterns, device outputs, and troubleshooting scenarios.
 from __future__ import annotations
 
 import json
+import os
 import random
-from typing import Any, Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import string
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 from . import TrainingExample
 
 logger = logging.getLogger(__name__)
 
+# Bytes accumulated before each write() on JSONL exports; large enough
+# that a typical dataset is flushed in a handful of system calls.
+_WRITE_BUFFER_SIZE = 1 << 20
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+class _JsonlSink:
+    """Collects JSON lines in memory and writes them to a file in large chunks."""
+    
+    def __init__(self, filepath: str):
+        self._fd = os.open(filepath, _WRITE_FLAGS, 0o644)
+        self._buf = bytearray()
+    
+    def write(self, line: bytes) -> None:
+        self._buf += line
+        if len(self._buf) >= _WRITE_BUFFER_SIZE:
+            self.flush()
+    
+    def flush(self) -> None:
+        written = 0
+        with memoryview(self._buf) as view:
+            while written < len(view):
+                with view[written:] as pending:
+                    written += os.write(self._fd, pending)
+        self._buf.clear()
+    
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
+    
+    def __enter__(self) -> "_JsonlSink":
+        return self
+    
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _write_jsonl(filepath: str, lines: Iterable[bytes]) -> int:
+    """Write serialized JSON lines to a file and return the number written."""
+    count = 0
+    with _JsonlSink(filepath) as sink:
+        for line in lines:
+            sink.write(line)
+            count += 1
+    return count
+
+
+def _to_alpaca(example: TrainingExample) -> Dict[str, Any]:
+    """Convert an example to an Alpaca record."""
+    return {
+        "instruction": example.instruction + "\n\n" + example.input_text,
+        "input": "",
+        "output": example.output_text,
+        "system": example.system_prompt,
+    }
+
+
+def _to_sharegpt(example: TrainingExample) -> Dict[str, Any]:
+    """Convert an example to a ShareGPT conversation record."""
+    return {
+        "conversations": [
+            {"from": "system", "value": example.system_prompt},
+            {"from": "human", "value": example.instruction + "\n\n" + example.input_text},
+            {"from": "gpt", "value": example.output_text}
+        ]
+    }
+
+
+# Every export record has a fixed schema whose variable parts are all
+# strings, so without orjson each line is built from a literal skeleton
+# and individually escaped values instead of walking a dict in json.dumps.
+_json_str = json.encoder.encode_basestring
+
+
+def _json_str_or_null(value: Optional[str]) -> str:
+    return "null" if value is None else _json_str(value)
+
+
+def _example_line(example: TrainingExample) -> bytes:
+    """Serialize an example in the native JSONL schema."""
+    if orjson is not None:
+        return orjson.dumps(example.to_dict(), option=orjson.OPT_APPEND_NEWLINE)
+    return (
+        '{"instruction":%s,"input":%s,"output":%s,"system":%s,"metadata":%s}\n' % (
+            _json_str(example.instruction),
+            _json_str(example.input_text),
+            _json_str(example.output_text),
+            _json_str_or_null(example.system_prompt),
+            json.dumps(example.metadata, ensure_ascii=False, separators=(",", ":")),
+        )
+    ).encode("utf-8")
+
+
+def _alpaca_line(example: TrainingExample) -> bytes:
+    """Serialize an example as an Alpaca record."""
+    if orjson is not None:
+        return orjson.dumps(_to_alpaca(example), option=orjson.OPT_APPEND_NEWLINE)
+    return (
+        '{"instruction":%s,"input":"","output":%s,"system":%s}\n' % (
+            _json_str(example.instruction + "\n\n" + example.input_text),
+            _json_str(example.output_text),
+            _json_str_or_null(example.system_prompt),
+        )
+    ).encode("utf-8")
+
+
+def _sharegpt_line(example: TrainingExample) -> bytes:
+    """Serialize an example as a ShareGPT conversation record."""
+    if orjson is not None:
+        return orjson.dumps(_to_sharegpt(example), option=orjson.OPT_APPEND_NEWLINE)
+    return (
+        '{"conversations":[{"from":"system","value":%s},'
+        '{"from":"human","value":%s},{"from":"gpt","value":%s}]}\n' % (
+            _json_str_or_null(example.system_prompt),
+            _json_str(example.instruction + "\n\n" + example.input_text),
+            _json_str(example.output_text),
+        )
+    ).encode("utf-8")
+
+
+def _pick_two(seq: Tuple[str, ...], randrange: Callable[[int], int]) -> Tuple[str, ...]:
+    """Pick two distinct items from a short tuple in random order."""
+    n = len(seq)
+    if n < 2:
+        return seq
+    i = randrange(n)
+    j = randrange(n - 1)
+    if j >= i:
+        j += 1
+    return seq[i], seq[j]
+
+
+def _pick_three(seq: Tuple[str, ...], randrange: Callable[[int], int]) -> Tuple[str, ...]:
+    """Pick three distinct items from a short tuple in random order."""
+    n = len(seq)
+    if n < 3:
+        return _pick_two(seq, randrange)
+    i = randrange(n)
+    j = randrange(n - 1)
+    if j >= i:
+        j += 1
+    k = randrange(n - 2)
+    # Skip over the two indices already taken, lowest first
+    if k >= min(i, j):
+        k += 1
+    if k >= max(i, j):
+        k += 1
+    return seq[i], seq[j], seq[k]
+
+
+# Examples per worker task when generating in parallel; small enough to
+# keep workers balanced, large enough to amortize process round-trips.
+_PARALLEL_CHUNK_SIZE = 250
+
+
+def _generate_chunk(args: Tuple[type, int, int, str]) -> List[TrainingExample]:
+    """Process-pool entry point: generate one seeded chunk of examples."""
+    builder_cls, seed, count, timestamp = args
+    return list(builder_cls(seed=seed).iter_examples(count, timestamp=timestamp))
+
+
+# (format, train file name, line serializer) for each export format
+_TRAIN_OUTPUTS = (
+    ("jsonl", "train.jsonl", _example_line),
+    ("alpaca", "train_alpaca.jsonl", _alpaca_line),
+    ("sharegpt", "train_sharegpt.jsonl", _sharegpt_line),
+)
+
+
+def _write_jsonl_multi(
+    outputs: List[Tuple[str, Callable[[TrainingExample], bytes]]],
+    examples: Iterable[TrainingExample],
+) -> int:
+    """
+    Write each example to several JSONL files in a single pass.
+    
+    ``outputs`` pairs a file path with the function that serializes an
+    example into that file's JSON line.
+    """
+    count = 0
+    with ExitStack() as stack:
+        writers = [
+            (stack.enter_context(_JsonlSink(path)).write, serialize)
+            for path, serialize in outputs
+        ]
+        for example in examples:
+            for write, serialize in writers:
+                write(serialize(example))
+            count += 1
+    return count
+
+
+def _compile_template(template: str) -> Callable[[Dict[str, Any]], str]:
+    """
+    Compile a str.format-style template into a specialized render function.
+    
+    The generated function binds each placeholder to a local and returns a
+    single f-string, so rendering skips format-string parsing and keyword
+    argument packing. Missing variables render as "N/A".
+    """
+    lines = ["def _render(v):", "    get = v.get"]
+    parts = []
+    fields: Dict[str, str] = {}
+    for literal, name, spec, conversion in string.Formatter().parse(template):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if name not in fields:
+            fields[name] = f"_{len(fields)}"
+            lines.append(f"    {fields[name]} = get({name!r}, 'N/A')")
+        parts.append(
+            "{" + fields[name]
+            + (f"!{conversion}" if conversion else "")
+            + (f":{spec}" if spec else "")
+            + "}"
+        )
+    lines.append(f"    return f{''.join(parts)!r}")
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_render"]
+
 
 @dataclass
 class NOCTrainingTemplate:
@@ -27,6 +262,12 @@ class NOCTrainingTemplate:
     input_template: str
     output_template: str
     variables: List[str]
+    render_input: Callable[[Dict[str, Any]], str] = field(init=False, repr=False, compare=False)
+    render_output: Callable[[Dict[str, Any]], str] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.render_input = _compile_template(self.input_template)
+        self.render_output = _compile_template(self.output_template)
 
 
 class NOCTrainingDataBuilder:
@@ -89,8 +330,41 @@ class NOCTrainingDataBuilder:
         }
     }
     
-    def __init__(self):
+    # ISSUE_CATEGORIES flattened into parallel tuples indexed by category id,
+    # so the per-example path does one tuple index instead of two dict lookups.
+    _CATEGORY_NAMES = tuple(ISSUE_CATEGORIES)
+    _SYMPTOMS = tuple(tuple(v["symptoms"]) for v in ISSUE_CATEGORIES.values())
+    _CAUSES = tuple(tuple(v["causes"]) for v in ISSUE_CATEGORIES.values())
+    _SOLUTIONS = tuple(tuple(v["solutions"]) for v in ISSUE_CATEGORIES.values())
+    # Display forms of each category name, e.g. "Cpu High" and "cpu high".
+    # Interned because they are derived rather than literal strings.
+    _CATEGORY_TITLES = tuple(sys.intern(name.replace("_", " ").title()) for name in _CATEGORY_NAMES)
+    _CATEGORY_LABELS = tuple(sys.intern(name.replace("_", " ")) for name in _CATEGORY_NAMES)
+    
+    def __init__(self, seed: Optional[int] = None):
+        # Per-builder RNG: seedable for reproducible datasets, and its bound
+        # methods can be held in locals on the per-example path.
+        self._rng = random.Random(seed)
         self.templates = self._build_templates()
+        # Every template variable, pre-filled with the "N/A" placeholder.
+        # Copying this per example yields a dict already sized for all
+        # fields, so filling it never triggers a rehash.
+        all_fields = sorted({name for tpl in self.templates for name in tpl.variables})
+        self._blank_variables = dict.fromkeys(all_fields, "N/A")
+        # Per-category variable fillers, keyed by template category
+        self._fillers: Dict[str, Callable[[Dict[str, Any], int], None]] = {
+            "alert_analysis": self._fill_alert,
+            "troubleshooting": self._fill_troubleshooting,
+            "correlation": self._fill_correlation,
+            "capacity_planning": self._fill_capacity,
+            "security": self._fill_security,
+        }
+        # CLI output depends only on (device type, issue), so render each pair once
+        self._cli_outputs = {
+            (device_type, issue): self._generate_cli_output(device_type, issue)
+            for device_type in self.DEVICE_TYPES
+            for issue in self._CATEGORY_NAMES
+        }
         self.generated_examples: List[TrainingExample] = []
     
     def _build_templates(self) -> List[NOCTrainingTemplate]:
@@ -266,59 +540,141 @@ Logs: {log_excerpt}""",
         
         return templates
     
-    def generate_examples(self, count: int = 100) -> List[TrainingExample]:
-        """Generate N training examples."""
-        examples = []
+    def iter_examples(
+        self,
+        count: int = 100,
+        workers: int = 1,
+        timestamp: Optional[str] = None
+    ) -> Iterator[TrainingExample]:
+        """
+        Yield N training examples one at a time without retaining them.
         
+        With workers > 1 the examples are generated in chunks across a
+        process pool and yielded in chunk order. Each chunk is seeded from
+        this builder's RNG, so a seeded builder stays reproducible for a given
+        worker count.
+        """
+        # One timestamp per batch; per-example precision adds nothing to the data
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        
+        if workers > 1 and count > _PARALLEL_CHUNK_SIZE:
+            sizes = [_PARALLEL_CHUNK_SIZE] * (count // _PARALLEL_CHUNK_SIZE)
+            if count % _PARALLEL_CHUNK_SIZE:
+                sizes.append(count % _PARALLEL_CHUNK_SIZE)
+            tasks = [(type(self), self._rng.getrandbits(64), size, timestamp) for size in sizes]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for chunk in executor.map(_generate_chunk, tasks):
+                    # Unpickled metadata strings are fresh copies per chunk;
+                    # intern them so retained examples share one object each.
+                    for example in chunk:
+                        metadata = example.metadata
+                        for key, value in metadata.items():
+                            metadata[key] = sys.intern(value)
+                    yield from chunk
+            return
+        
+        choice = self._rng.choice
+        templates = self.templates
         for _ in range(count):
-            template = random.choice(self.templates)
-            example = self._generate_from_template(template)
-            examples.append(example)
+            yield self._generate_from_template(choice(templates), timestamp)
+    
+    def generate_examples(
+        self,
+        count: int = 100,
+        workers: int = 1,
+        timestamp: Optional[str] = None
+    ) -> List[TrainingExample]:
+        """Generate N training examples."""
+        examples = list(self.iter_examples(count, workers=workers, timestamp=timestamp))
         
         self.generated_examples.extend(examples)
         logger.info(f"Generated {len(examples)} training examples")
         return examples
     
-    def _generate_from_template(self, template: NOCTrainingTemplate) -> TrainingExample:
+    def _generate_from_template(
+        self,
+        template: NOCTrainingTemplate,
+        timestamp: Optional[str] = None
+    ) -> TrainingExample:
         """Generate a single training example from a template."""
-        variables = {}
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        
+        rng = self._rng
+        randint = rng.randint
+        
+        variables = self._blank_variables.copy()
         
         # Common variables
-        device_type = random.choice(self.DEVICE_TYPES)
-        device_name = f"{device_type}-{(random.randint(1, 99)):02d}"
+        device_type = rng.choice(self.DEVICE_TYPES)
+        device_name = f"{device_type}-{(randint(1, 99)):02d}"
         
         variables["device_name"] = device_name
         variables["device_type"] = device_type
-        variables["timestamp"] = datetime.now().isoformat()
-        variables["ticket_id"] = f"{random.randint(10000, 99999)}"
-        variables["confidence"] = random.randint(75, 98)
+        variables["timestamp"] = timestamp
+        variables["ticket_id"] = f"{randint(10000, 99999)}"
+        variables["confidence"] = randint(75, 98)
         
         # Issue-specific variables
-        issue_category = random.choice(list(self.ISSUE_CATEGORIES.keys()))
-        issue_data = self.ISSUE_CATEGORIES[issue_category]
+        cid = rng.randrange(len(self._CATEGORY_NAMES))
+        issue_category = self._CATEGORY_NAMES[cid]
         
-        variables["issue_type"] = issue_category.replace("_", " ").title()
-        variables["root_cause"] = random.choice(issue_data["causes"])
+        variables["issue_type"] = self._CATEGORY_TITLES[cid]
+        variables["root_cause"] = rng.choice(self._CAUSES[cid])
+        
+        # Only compute the fields this template renders; categories without
+        # a dedicated filler get every field, as before.
+        fill = self._fillers.get(template.category)
+        if fill is not None:
+            fill(variables, cid)
+        else:
+            for fill in self._fillers.values():
+                fill(variables, cid)
         
-        symptoms = random.sample(issue_data["symptoms"], k=min(2, len(issue_data["symptoms"])))
-        variables["symptoms"] = ", ".join(symptoms)
+        # Build input and output
+        instruction = template.instruction_template
+        input_text = template.render_input(variables)
+        output_text = template.render_output(variables)
         
-        solutions = random.sample(issue_data["solutions"], k=min(3, len(issue_data["solutions"])))
+        return TrainingExample(
+            instruction=instruction,
+            input_text=input_text,
+            output_text=output_text,
+            system_prompt="You are an expert NOC AI assistant with deep knowledge of network operations, troubleshooting, and incident response. Provide accurate, actionable analysis.",
+            metadata={
+                "category": template.category,
+                "device_type": device_type,
+                "issue_category": issue_category,
+                "generated_at": timestamp,
+            }
+        )
+    
+    def _fill_solution_actions(self, variables: Dict[str, Any], cid: int) -> None:
+        """Fill action_1..3 from the category's known solutions."""
+        solutions = _pick_three(self._SOLUTIONS[cid], self._rng.randrange)
         variables["action_1"] = solutions[0]
         variables["action_2"] = solutions[1] if len(solutions) > 1 else "Monitor for recurrence"
         variables["action_3"] = solutions[2] if len(solutions) > 2 else "Document in knowledge base"
+    
+    def _fill_alert(self, variables: Dict[str, Any], cid: int) -> None:
+        """Fill alert analysis variables."""
+        rng = self._rng
+        choice = rng.choice
+        randint = rng.randint
+        
+        self._fill_solution_actions(variables, cid)
         
         # Generate alert message
-        severity = random.choice(["warning", "critical", "major"])
-        metric_value = random.randint(85, 99)
-        variables["severity"] = severity.upper()
-        variables["alert_message"] = f"{issue_category.replace('_', ' ').title()} - {metric_value}% utilization"
+        variables["severity"] = choice(("WARNING", "CRITICAL", "MAJOR"))
+        metric_value = randint(85, 99)
+        variables["alert_message"] = f"{self._CATEGORY_TITLES[cid]} - {metric_value}% utilization"
         
         # Metrics
-        variables["metrics"] = f"CPU: {random.randint(10, 95)}%, Memory: {random.randint(20, 90)}%, Disk: {random.randint(30, 85)}%"
+        variables["metrics"] = f"CPU: {randint(10, 95)}%, Memory: {randint(20, 90)}%, Disk: {randint(30, 85)}%"
         
         # Changes
-        variables["changes"] = random.choice([
+        variables["changes"] = choice([
             "None in last 24h",
             "Config change 2h ago",
             "Software update yesterday",
@@ -326,80 +682,87 @@ Logs: {log_excerpt}""",
         ])
         
         # Impact
-        variables["affected_services"] = random.choice([
+        variables["affected_services"] = choice([
             "Core routing",
             "Edge connectivity", 
             "Management access",
             "VPN services"
         ])
-        variables["user_impact"] = random.choice(["Low", "Medium", "High", "Critical"])
-        variables["duration"] = f"{random.randint(5, 120)} minutes"
+        variables["user_impact"] = choice(["Low", "Medium", "High", "Critical"])
+        variables["duration"] = f"{randint(5, 120)} minutes"
         
         # Prevention
-        variables["prevention"] = f"Implement monitoring for {issue_category.replace('_', ' ')} and set proactive thresholds at 80%"
+        variables["prevention"] = f"Implement monitoring for {self._CATEGORY_LABELS[cid]} and set proactive thresholds at 80%"
+    
+    def _fill_troubleshooting(self, variables: Dict[str, Any], cid: int) -> None:
+        """Fill troubleshooting variables."""
+        randint = self._rng.randint
+        issue_category = self._CATEGORY_NAMES[cid]
+        issue_label = self._CATEGORY_LABELS[cid]
+        
+        variables["symptoms"] = ", ".join(_pick_two(self._SYMPTOMS[cid], self._rng.randrange))
+        self._fill_solution_actions(variables, cid)
         
         # CLI output (simplified)
-        variables["cli_output"] = self._generate_cli_output(device_type, issue_category)
+        variables["cli_output"] = self._cli_outputs[variables["device_type"], issue_category]
         
         # Other fields
-        variables["issue_description"] = f"{issue_category.replace('_', ' ').title()} on {device_name}"
+        variables["issue_description"] = f"{self._CATEGORY_TITLES[cid]} on {variables['device_name']}"
         variables["issue_category"] = issue_category
         
-        variables["diag_1"] = f"Check current {issue_category.replace('_', ' ')} status"
+        variables["diag_1"] = f"Check current {issue_label} status"
         variables["diag_2"] = "Review recent configuration changes"
         variables["diag_3"] = "Analyze historical trends"
         
-        variables["analysis"] = f"The {issue_category.replace('_', ' ')} issue is likely caused by {variables['root_cause']}. Pattern matches known issue #KB-{random.randint(1000, 9999)}."
-        variables["resolution"] = f"Apply fix: {variables['action_1']}. This should resolve the issue within {random.randint(2, 10)} minutes."
-        variables["verification"] = f"Monitor {issue_category.replace('_', ' ')} metrics for 15 minutes to confirm resolution."
-        variables["ttc"] = str(random.randint(10, 45))
-        
-        # Capacity planning variables
-        variables["resource_type"] = random.choice(["CPU", "Memory", "Disk", "Bandwidth"])
-        variables["current"] = str(random.randint(60, 85))
-        variables["trend"] = str(random.randint(2, 8))
-        variables["period"] = random.choice(["day", "week", "month"])
+        variables["analysis"] = f"The {issue_label} issue is likely caused by {variables['root_cause']}. Pattern matches known issue #KB-{randint(1000, 9999)}."
+        variables["resolution"] = f"Apply fix: {variables['action_1']}. This should resolve the issue within {randint(2, 10)} minutes."
+        variables["verification"] = f"Monitor {issue_label} metrics for 15 minutes to confirm resolution."
+        variables["ttc"] = str(randint(10, 45))
+    
+    def _fill_correlation(self, variables: Dict[str, Any], cid: int) -> None:
+        """Fill correlation variables (only the common fields are synthesized today)."""
+    
+    def _fill_capacity(self, variables: Dict[str, Any], cid: int) -> None:
+        """Fill capacity planning variables."""
+        rng = self._rng
+        choice = rng.choice
+        randint = rng.randint
+        
+        variables["resource_type"] = choice(["CPU", "Memory", "Disk", "Bandwidth"])
+        current = randint(60, 85)
+        trend = randint(2, 8)
+        period = choice(["day", "week", "month"])
+        variables["current"] = str(current)
+        variables["trend"] = str(trend)
+        variables["period"] = period
         variables["threshold"] = "90"
-        variables["history"] = f"Past 30 days: avg {int(variables['current'])-10}%, peak {int(variables['current'])+5}%"
-        variables["time_to_threshold"] = f"{(90 - int(variables['current'])) // int(variables['trend'])} {variables['period']}s"
-        variables["time_to_critical"] = f"{(95 - int(variables['current'])) // int(variables['trend'])} {variables['period']}s"
+        variables["history"] = f"Past 30 days: avg {current - 10}%, peak {current + 5}%"
+        variables["time_to_threshold"] = f"{(90 - current) // trend} {period}s"
+        variables["time_to_critical"] = f"{(95 - current) // trend} {period}s"
         variables["rec_1"] = f"Add capacity before reaching 90% {variables['resource_type']} utilization"
         variables["rec_2"] = "Implement predictive scaling"
         variables["rec_3"] = "Review resource allocation policies"
         variables["planning_actions"] = f"Schedule capacity addition within {variables['time_to_threshold']}"
-        
-        # Security variables
-        variables["alert_type"] = random.choice(["Brute force", "DDoS", "Port scan", "Anomalous traffic"])
-        variables["source_ip"] = f"192.168.{random.randint(1, 254)}.{random.randint(1, 254)}"
-        variables["target_resource"] = random.choice(["Web server", "SSH gateway", "VPN concentrator", "DNS server"])
-        variables["attack_pattern"] = random.choice(["Multiple failed logins", "SYN flood", "Unusual port access", "Volume spike"])
-        variables["log_excerpt"] = f"Failed auth from {variables['source_ip']}: {random.randint(50, 500)} attempts"
+    
+    def _fill_security(self, variables: Dict[str, Any], cid: int) -> None:
+        """Fill security incident variables."""
+        rng = self._rng
+        choice = rng.choice
+        randint = rng.randint
+        
+        variables["alert_type"] = choice(["Brute force", "DDoS", "Port scan", "Anomalous traffic"])
+        variables["source_ip"] = f"192.168.{randint(1, 254)}.{randint(1, 254)}"
+        variables["target_resource"] = choice(["Web server", "SSH gateway", "VPN concentrator", "DNS server"])
+        variables["attack_pattern"] = choice(["Multiple failed logins", "SYN flood", "Unusual port access", "Volume spike"])
+        variables["log_excerpt"] = f"Failed auth from {variables['source_ip']}: {randint(50, 500)} attempts"
         variables["threat_type"] = variables["alert_type"]
-        variables["severity"] = random.choice(["HIGH", "CRITICAL"])
+        variables["severity"] = choice(["HIGH", "CRITICAL"])
         variables["attack_details"] = f"Detected {variables['attack_pattern']} targeting {variables['target_resource']}"
         variables["action_1"] = f"Block IP {variables['source_ip']} at firewall"
         variables["action_2"] = f"Enable enhanced logging on {variables['target_resource']}"
         variables["action_3"] = "Notify security team"
         variables["investigation"] = "Review access logs for compromise indicators"
         variables["escalation"] = "SOC team notified"
-        
-        # Build input and output
-        instruction = template.instruction_template
-        input_text = template.input_template.format(**{k: variables.get(k, "N/A") for k in template.variables})
-        output_text = template.output_template.format(**{k: variables.get(k, "N/A") for k in template.variables})
-        
-        return TrainingExample(
-            instruction=instruction,
-            input_text=input_text,
-            output_text=output_text,
-            system_prompt="You are an expert NOC AI assistant with deep knowledge of network operations, troubleshooting, and incident response. Provide accurate, actionable analysis.",
-            metadata={
-                "category": template.category,
-                "device_type": device_type,
-                "issue_category": issue_category,
-                "generated_at": datetime.now().isoformat(),
-            }
-        )
     
     def _generate_cli_output(self, device_type: str, issue: str) -> str:
         """Generate realistic CLI output based on device type and issue."""
@@ -419,44 +782,19 @@ Logs: {log_excerpt}""",
     
     def export_to_jsonl(self, filepath: str) -> int:
         """Export generated examples to JSONL file."""
-        count = 0
-        with open(filepath, 'w') as f:
-            for example in self.generated_examples:
-                f.write(json.dumps(example.to_dict()) + '\n')
-                count += 1
+        count = _write_jsonl(filepath, map(_example_line, self.generated_examples))
         logger.info(f"Exported {count} examples to {filepath}")
         return count
     
     def export_alpaca_format(self, filepath: str) -> int:
         """Export in Alpaca training format."""
-        count = 0
-        with open(filepath, 'w') as f:
-            for example in self.generated_examples:
-                alpaca_format = {
-                    "instruction": example.instruction + "\n\n" + example.input_text,
-                    "input": "",
-                    "output": example.output_text,
-                    "system": example.system_prompt,
-                }
-                f.write(json.dumps(alpaca_format) + '\n')
-                count += 1
+        count = _write_jsonl(filepath, map(_alpaca_line, self.generated_examples))
         logger.info(f"Exported {count} examples in Alpaca format to {filepath}")
         return count
     
     def export_sharegpt_format(self, filepath: str) -> int:
         """Export in ShareGPT format."""
-        count = 0
-        with open(filepath, 'w') as f:
-            for example in self.generated_examples:
-                sharegpt_format = {
-                    "conversations": [
-                        {"from": "system", "value": example.system_prompt},
-                        {"from": "human", "value": example.instruction + "\n\n" + example.input_text},
-                        {"from": "gpt", "value": example.output_text}
-                    ]
-                }
-                f.write(json.dumps(sharegpt_format) + '\n')
-                count += 1
+        count = _write_jsonl(filepath, map(_sharegpt_line, self.generated_examples))
         logger.info(f"Exported {count} examples in ShareGPT format to {filepath}")
         return count
     
@@ -466,46 +804,48 @@ Logs: {log_excerpt}""",
         output_dir: str,
         train_count: int = 1000,
         eval_count: int = 200,
-        formats: List[str] = None
+        formats: List[str] = None,
+        workers: int = 1,
+        seed: Optional[int] = None
     ) -> Dict[str, str]:
         """
         Create a complete NOC training dataset.
         
+        Set workers > 1 to generate examples across that many processes,
+        and seed to make the generated examples reproducible.
         Returns paths to generated files.
         """
         if formats is None:
             formats = ["jsonl", "alpaca"]
         
-        import os
         os.makedirs(output_dir, exist_ok=True)
         
-        builder = cls()
-        
-        # Generate training data
-        train_examples = builder.generate_examples(train_count)
+        builder = cls(seed=seed)
+        # One timestamp for the whole dataset: examples and dataset_info agree
+        generated_at = datetime.now().isoformat()
         
+        # Train examples are streamed straight to every requested format,
+        # so no example is held in memory after it has been written.
         paths = {}
-        
-        # Export in requested formats
+        outputs = []
+        for fmt, filename, convert in _TRAIN_OUTPUTS:
+            if fmt in formats:
+                paths[f"train_{fmt}"] = os.path.join(output_dir, filename)
+                outputs.append((paths[f"train_{fmt}"], convert))
         if "jsonl" in formats:
-            paths["train_jsonl"] = os.path.join(output_dir, "train.jsonl")
-            builder.export_to_jsonl(paths["train_jsonl"])
-        
-        if "alpaca" in formats:
-            paths["train_alpaca"] = os.path.join(output_dir, "train_alpaca.jsonl")
-            builder.export_alpaca_format(paths["train_alpaca"])
+            paths["eval_jsonl"] = os.path.join(output_dir, "eval.jsonl")
         
-        if "sharegpt" in formats:
-            paths["train_sharegpt"] = os.path.join(output_dir, "train_sharegpt.jsonl")
-            builder.export_sharegpt_format(paths["train_sharegpt"])
+        # Train and eval come from one generation pipeline (one timestamp,
+        # one worker pool): the first train_count examples go to the train
+        # files and the remainder to the eval file.
+        total = (train_count if outputs else 0) + (eval_count if "eval_jsonl" in paths else 0)
+        examples = builder.iter_examples(total, workers=workers, timestamp=generated_at)
         
-        # Generate eval data
-        builder.generated_examples = []  # Clear for eval
-        eval_examples = builder.generate_examples(eval_count)
+        if outputs:
+            _write_jsonl_multi(outputs, islice(examples, train_count))
         
-        if "jsonl" in formats:
-            paths["eval_jsonl"] = os.path.join(output_dir, "eval.jsonl")
-            builder.export_to_jsonl(paths["eval_jsonl"])
+        if "eval_jsonl" in paths:
+            _write_jsonl(paths["eval_jsonl"], map(_example_line, examples))
         
         # Create dataset info
         info = {
@@ -516,7 +856,7 @@ Logs: {log_excerpt}""",
             "eval_examples": eval_count,
             "categories": list(builder.ISSUE_CATEGORIES.keys()),
             "device_types": builder.DEVICE_TYPES,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": generated_at,
             "files": paths,
         }
         
@@ -10,15 +10,81 @@ from __future__ import annotations
 import os
 import json
 import time
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Callable, Iterator
+import hashlib
+import functools
+import importlib.util
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Callable, Iterator, Tuple
 from pathlib import Path
+from types import SimpleNamespace
 import logging
 
+from autodetector._compat import DATACLASS_SLOTS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Rows serialized per write in prepare_data; bounds memory for huge inputs
+_PREPARE_CHUNK_ROWS = 10_000
+# File buffer for prepare_data, so small final chunks still go out in few syscalls
+_PREPARE_BUFFER_SIZE = 1 << 22
+# LoRA over a half-precision base needs the weights plus ~30% for adapters,
+# their optimizer state and activations
+_LORA_VRAM_HEADROOM = 1.3
+# Bytes per parameter of checkpoint dtypes wider than half precision
+_WIDE_DTYPE_BYTES = {"float32": 4, "float64": 8}
 
-@dataclass
+
+# Prompt layouts per architecture as (with input, without input)
+# %-templates over instruction[, input], output
+_PROMPT_TEMPLATES: Dict[str, Tuple[str, str]] = {
+    "gpt": (
+        "### Instruction:\n%s\n\n### Input:\n%s\n\n### Response:\n%s</s>",
+        "### Instruction:\n%s\n\n### Response:\n%s</s>",
+    ),
+    "claude": (
+        "<human>\n%s\n\n%s\n</human>\n\n<assistant>\n%s\n</assistant>",
+        "<human>\n%s\n</human>\n\n<assistant>\n%s\n</assistant>",
+    ),
+    "gemini": (
+        "user: %s\n%s\nmodel: %s",
+        "user: %s\nmodel: %s",
+    ),
+}
+
+
+# Tokenizers loaded by _tokenize_batch, keyed by model path (one per process)
+_WORKER_TOKENIZERS: Dict[str, Any] = {}
+
+
+def _tokenize_batch(examples: Dict[str, List[str]], tokenizer_name: str, max_length: int) -> Dict[str, Any]:
+    """
+    Tokenize a batch of dataset rows for dataset.map().
+    
+    Module-level so map() workers receive only the model path and length
+    instead of a pickled tokenizer; each process loads its tokenizer once.
+    """
+    tokenizer = _WORKER_TOKENIZERS.get(tokenizer_name)
+    if tokenizer is None:
+        from transformers import AutoTokenizer
+        
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+        _WORKER_TOKENIZERS[tokenizer_name] = tokenizer
+    return tokenizer(examples["text"], truncation=True, max_length=max_length)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a record to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(**DATACLASS_SLOTS)
 class TrainingConfig:
     """Configuration for training/fine-tuning."""
     # Model settings
@@ -27,7 +93,7 @@ class TrainingConfig:
     architecture: str = "gpt"  # gpt, claude, gemini
     
     # Training method
-    method: str = "lora"  # lora, qlora, full
+    method: str = "lora"  # lora, qlora, full, auto
     
     # LoRA settings
     lora_r: int = 16
@@ -61,43 +127,15 @@ class TrainingConfig:
     fp16: bool = True
     bf16: bool = False
     gradient_checkpointing: bool = True
+    gradient_checkpointing_interval: int = 1  # checkpoint every k-th layer; 2 halves recompute
     max_memory_gb: int = 16
+    torch_compile: bool = True  # torch.compile LoRA/QLoRA models on CUDA when batches are packed
     
     # NOC-specific
     system_prompt: str = "You are an expert Network Operations Center (NOC) AI assistant. Analyze network issues and provide actionable recommendations."
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "base_model_path": self.base_model_path,
-            "output_dir": self.output_dir,
-            "architecture": self.architecture,
-            "method": self.method,
-            "lora_r": self.lora_r,
-            "lora_alpha": self.lora_alpha,
-            "lora_dropout": self.lora_dropout,
-            "lora_target_modules": self.lora_target_modules,
-            "num_epochs": self.num_epochs,
-            "batch_size": self.batch_size,
-            "gradient_accumulation_steps": self.gradient_accumulation_steps,
-            "learning_rate": self.learning_rate,
-            "max_seq_length": self.max_seq_length,
-            "warmup_steps": self.warmup_steps,
-            "save_steps": self.save_steps,
-            "eval_steps": self.eval_steps,
-            "logging_steps": self.logging_steps,
-            "optimizer": self.optimizer,
-            "lr_scheduler": self.lr_scheduler,
-            "weight_decay": self.weight_decay,
-            "max_grad_norm": self.max_grad_norm,
-            "train_data_path": self.train_data_path,
-            "eval_data_path": self.eval_data_path,
-            "validation_split": self.validation_split,
-            "fp16": self.fp16,
-            "bf16": self.bf16,
-            "gradient_checkpointing": self.gradient_checkpointing,
-            "max_memory_gb": self.max_memory_gb,
-            "system_prompt": self.system_prompt,
-        }
+        return asdict(self)
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "TrainingConfig":
@@ -105,6 +143,10 @@ class TrainingConfig:
     
     def save(self, path: str) -> None:
         """Save config to JSON file."""
+        if orjson is not None:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
+            return
         with open(path, 'w') as f:
             json.dump(self.to_dict(), f, indent=2)
     
@@ -115,7 +157,7 @@ class TrainingConfig:
             return cls.from_dict(json.load(f))
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TrainingMetrics:
     """Training metrics for monitoring progress."""
     step: int
@@ -129,6 +171,17 @@ class TrainingMetrics:
     timestamp: float = field(default_factory=time.time)
 
 
+@dataclass
+class _TrainingStrategy:
+    """How one training method loads its model and configures the Trainer."""
+    method: str
+    description: str
+    load_model: Callable[[Any], Any]  # compute dtype -> trainable model
+    optim: str
+    training_args: Dict[str, Any] = field(default_factory=dict)
+    packed: bool = True  # packed, compiled trainer (adapter methods)
+
+
 class TrainingCallback:
     """Callback for training events."""
     
@@ -173,6 +226,46 @@ class NOCModelTrainer:
         self._is_training = False
         self._current_step = 0
         self._trainer = None
+        self._imports_cache: Optional[SimpleNamespace] = None
+    
+    def _lazy_imports(self) -> SimpleNamespace:
+        """
+        Import the training stack (torch, transformers, peft, datasets) once.
+        
+        Constructing a trainer stays import-free; the first training call
+        pays the import cost and later calls reuse the cached namespace.
+        """
+        if self._imports_cache is not None:
+            return self._imports_cache
+        
+        import torch
+        from transformers import (
+            AutoConfig,
+            AutoModelForCausalLM,
+            AutoTokenizer,
+            BitsAndBytesConfig,
+            DataCollatorForLanguageModeling,
+            Trainer,
+            TrainingArguments,
+        )
+        from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
+        from datasets import load_dataset
+        
+        self._imports_cache = SimpleNamespace(
+            torch=torch,
+            AutoConfig=AutoConfig,
+            AutoModelForCausalLM=AutoModelForCausalLM,
+            AutoTokenizer=AutoTokenizer,
+            BitsAndBytesConfig=BitsAndBytesConfig,
+            DataCollatorForLanguageModeling=DataCollatorForLanguageModeling,
+            Trainer=Trainer,
+            TrainingArguments=TrainingArguments,
+            LoraConfig=LoraConfig,
+            get_peft_model=get_peft_model,
+            prepare_model_for_kbit_training=prepare_model_for_kbit_training,
+            load_dataset=load_dataset,
+        )
+        return self._imports_cache
     
     def add_callback(self, callback: TrainingCallback) -> None:
         """Add a training callback."""
@@ -190,70 +283,365 @@ class NOCModelTrainer:
         output_path = os.path.join(self.config.output_dir, "train_data.jsonl")
         os.makedirs(self.config.output_dir, exist_ok=True)
         
-        with open(output_path, 'w') as f:
-            for ex in examples:
-                # Format according to architecture
-                if self.config.architecture == "gpt":
-                    formatted = self._format_gpt_example(ex)
-                elif self.config.architecture == "claude":
-                    formatted = self._format_claude_example(ex)
-                elif self.config.architecture == "gemini":
-                    formatted = self._format_gemini_example(ex)
-                else:
-                    formatted = self._format_default_example(ex)
-                
-                f.write(json.dumps(formatted) + '\n')
+        # Format according to architecture
+        formatter = self._build_formatter()
+        
+        with open(output_path, 'wb', buffering=_PREPARE_BUFFER_SIZE) as f:
+            for start in range(0, len(examples), _PREPARE_CHUNK_ROWS):
+                lines = [_dumps(formatter(ex)) for ex in examples[start:start + _PREPARE_CHUNK_ROWS]]
+                lines.append(b"")
+                f.write(b"\n".join(lines))
         
         self.config.train_data_path = output_path
         logger.info(f"Prepared {len(examples)} training examples at {output_path}")
         return output_path
     
-    def _format_gpt_example(self, ex: Dict[str, str]) -> Dict[str, str]:
-        """Format example for GPT-style training."""
-        instruction = ex.get("instruction", "")
-        input_text = ex.get("input", "")
-        output = ex.get("output", "")
+    def _build_formatter(self) -> Callable[[Dict[str, str]], Dict[str, str]]:
+        """Build the example formatter for the configured architecture."""
+        templates = _PROMPT_TEMPLATES.get(self.config.architecture)
+        if templates is None:
+            return self._format_default_example
+        with_input, without_input = templates
         
-        if input_text:
-            prompt = f"### Instruction:\n{instruction}\n\n### Input:\n{input_text}\n\n### Response:\n"
-        else:
-            prompt = f"### Instruction:\n{instruction}\n\n### Response:\n"
+        def format_example(ex: Dict[str, str]) -> Dict[str, str]:
+            get = ex.get
+            input_text = get("input", "")
+            if input_text:
+                return {"text": with_input % (get("instruction", ""), input_text, get("output", ""))}
+            return {"text": without_input % (get("instruction", ""), get("output", ""))}
         
-        return {
-            "text": prompt + output + "</s>"
-        }
+        return format_example
+    
+    def _format_default_example(self, ex: Dict[str, str]) -> Dict[str, str]:
+        """Default formatting."""
+        return ex
     
-    def _format_claude_example(self, ex: Dict[str, str]) -> Dict[str, str]:
-        """Format example for Claude-style training."""
-        instruction = ex.get("instruction", "")
-        input_text = ex.get("input", "")
-        output = ex.get("output", "")
+    def _select_method(self) -> str:
+        """
+        Choose between LoRA and QLoRA for method="auto" based on free VRAM.
         
-        parts = [f"<human>\n{instruction}"]
-        if input_text:
-            parts.append(f"\n\n{input_text}")
-        parts.append("\n</human>\n\n<assistant>\n")
-        parts.append(output)
-        parts.append("\n</assistant>")
+        LoRA is chosen when the half-precision weights (see
+        _half_precision_weight_bytes()) fit in free GPU memory with headroom
+        for activations and adapters; otherwise the base model is loaded
+        4-bit via QLoRA, which is also the fallback when the size cannot be
+        determined (e.g. offline with a Hub id). Full fine-tuning is never
+        picked automatically.
+        """
+        torch = self._lazy_imports().torch
         
-        return {"text": "".join(parts)}
-    
-    def _format_gemini_example(self, ex: Dict[str, str]) -> Dict[str, str]:
-        """Format example for Gemini-style training."""
-        instruction = ex.get("instruction", "")
-        input_text = ex.get("input", "")
-        output = ex.get("output", "")
+        if not torch.cuda.is_available():
+            logger.info("No CUDA device available; auto-selected LoRA")
+            return "lora"
+        
+        free_bytes = torch.cuda.mem_get_info()[0]
+        weight_bytes = self._half_precision_weight_bytes()
+        if weight_bytes is None:
+            logger.info(
+                f"Could not size checkpoint {self.config.base_model_path!r}; auto-selected qlora"
+            )
+            return "qlora"
+        
+        method = "lora" if weight_bytes * _LORA_VRAM_HEADROOM < free_bytes else "qlora"
+        logger.info(
+            f"Auto-selected {method}: ~{weight_bytes / 1e9:.1f} GB weights, "
+            f"{free_bytes / 1e9:.1f} GB VRAM free"
+        )
+        return method
+    
+    def _half_precision_weight_bytes(self) -> Optional[int]:
+        """
+        Estimated bytes of the base weights loaded in fp16/bf16, or None if unknown.
+        
+        The checkpoint size is scaled by the dtype it was saved in
+        (config.json's torch_dtype), taken as half precision when unset.
+        """
+        weight_bytes = self._checkpoint_weight_bytes()
+        if weight_bytes is None:
+            return None
+        try:
+            stored_dtype = self._lazy_imports().AutoConfig.from_pretrained(
+                self.config.base_model_path
+            ).torch_dtype
+        except Exception as e:  # offline, or no config.json
+            logger.debug(f"Could not read torch_dtype of {self.config.base_model_path!r}: {e}")
+            stored_dtype = None
+        stored_bytes = _WIDE_DTYPE_BYTES.get(str(stored_dtype).replace("torch.", ""), 2)
+        return weight_bytes * 2 // stored_bytes
+    
+    def _checkpoint_weight_bytes(self) -> Optional[int]:
+        """
+        Bytes of one copy of the base model weights, or None if unknown.
+        
+        Many checkpoints ship the same weights as both .safetensors and .bin,
+        so only one format is counted, preferring safetensors.
+        """
+        path = self.config.base_model_path
+        if os.path.isdir(path):
+            files = [(entry.name, entry.stat().st_size) for entry in os.scandir(path) if entry.is_file()]
+        else:
+            try:
+                from huggingface_hub import HfApi
+                
+                info = HfApi().model_info(path, files_metadata=True)
+                files = [(f.rfilename, f.size or 0) for f in info.siblings or ()]
+            except Exception as e:  # not installed, offline, or unknown repo
+                logger.debug(f"Hub lookup for {path!r} failed: {e}")
+                return None
+        
+        by_format = {".safetensors": 0, ".bin": 0}
+        for name, size in files:
+            for suffix in by_format:
+                if name.endswith(suffix):
+                    by_format[suffix] += size
+        return by_format[".safetensors"] or by_format[".bin"] or None
+    
+    def _attn_implementation(self, model_config: Any, torch_dtype: Any) -> Optional[str]:
+        """
+        Attention kernel to request for the base model, or None for the default.
+        
+        FlashAttention-2 when flash-attn is installed, the model class supports
+        it, every GPU is Ampere or newer and the weights are half precision;
+        else PyTorch SDPA when the class supports that. Both avoid
+        materializing the full attention matrix in GPU memory, which dominates
+        memory traffic at long sequence lengths. Architectures the auto
+        mapping doesn't know (remote code) are left to transformers.
+        """
+        deps = self._lazy_imports()
+        torch = deps.torch
+        try:
+            model_class = deps.AutoModelForCausalLM._model_mapping[type(model_config)]
+        except (KeyError, AttributeError):
+            return None
         
-        parts = [f"user: {instruction}"]
-        if input_text:
-            parts.append(f"\n{input_text}")
-        parts.append(f"\nmodel: {output}")
+        if (
+            getattr(model_class, "_supports_flash_attn_2", False)
+            and torch_dtype in (torch.float16, torch.bfloat16)
+            and torch.cuda.is_available()
+            and all(
+                torch.cuda.get_device_capability(i)[0] >= 8
+                for i in range(torch.cuda.device_count())
+            )
+            and importlib.util.find_spec("flash_attn") is not None
+        ):
+            return "flash_attention_2"
+        if getattr(model_class, "_supports_sdpa", False):
+            return "sdpa"
+        return None
+    
+    @staticmethod
+    def _with_attn_implementation(
+        factory: Callable[..., Any],
+        attn_implementation: Optional[str],
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Call a model factory requesting attn_implementation, retrying without.
+        
+        transformers raises ValueError when the kernel turns out to be
+        unusable for this model or install; the retry lets it pick its
+        default instead of failing the load.
+        """
+        if attn_implementation is not None:
+            try:
+                return factory(*args, attn_implementation=attn_implementation, **kwargs)
+            except ValueError as e:
+                logger.warning(f"{attn_implementation} attention unavailable ({e}); using the default")
+        return factory(*args, **kwargs)
+    
+    def _use_bf16(self, torch: Any) -> bool:
+        """
+        Whether to train in bf16.
         
-        return {"text": "".join(parts)}
+        bf16 is used when requested, or in place of fp16 on GPUs that support
+        it (Ampere and newer): same tensor-core throughput, but no loss scaling
+        and no overflow-skipped steps.
+        """
+        if self.config.bf16:
+            return True
+        return self.config.fp16 and torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+    
+    def _load_tokenizer(self) -> Any:
+        """Load the fast (Rust) tokenizer for the base model."""
+        tokenizer = self._lazy_imports().AutoTokenizer.from_pretrained(
+            self.config.base_model_path,
+            use_fast=True,
+            model_max_length=self.config.max_seq_length,
+        )
+        if not tokenizer.is_fast:
+            logger.warning(
+                f"No fast tokenizer available for {self.config.base_model_path}; "
+                "tokenization will be slow"
+            )
+        tokenizer.pad_token = tokenizer.eos_token
+        return tokenizer
     
-    def _format_default_example(self, ex: Dict[str, str]) -> Dict[str, str]:
-        """Default formatting."""
-        return ex
+    def _load_model(self, torch_dtype: Any, quantization_config: Any = None) -> Any:
+        """
+        Load the base model for training, optionally quantized.
+        
+        For an unquantized local checkpoint the model is built on the meta
+        device with accelerate and its shards are streamed straight to their
+        target devices, so no full-size random init is allocated first. Hub
+        model ids, quantized loads, or installs without accelerate use
+        from_pretrained().
+        """
+        deps = self._lazy_imports()
+        path = self.config.base_model_path
+        model_config = deps.AutoConfig.from_pretrained(path)
+        attn_implementation = self._attn_implementation(model_config, torch_dtype)
+        use_cache = not self.config.gradient_checkpointing
+        
+        if (
+            quantization_config is None
+            and os.path.isdir(path)
+            and importlib.util.find_spec("accelerate") is not None
+        ):
+            from accelerate import init_empty_weights, load_checkpoint_and_dispatch
+        
+            model_config.use_cache = use_cache
+            with init_empty_weights():
+                model = self._with_attn_implementation(
+                    deps.AutoModelForCausalLM.from_config,
+                    attn_implementation,
+                    model_config,
+                    torch_dtype=torch_dtype,
+                )
+            model.tie_weights()
+            return load_checkpoint_and_dispatch(
+                model,
+                path,
+                device_map="auto",
+                dtype=torch_dtype,
+                no_split_module_classes=model._no_split_modules,
+            )
+        
+        return self._with_attn_implementation(
+            deps.AutoModelForCausalLM.from_pretrained,
+            attn_implementation,
+            path,
+            torch_dtype=torch_dtype,
+            device_map="auto",
+            use_cache=use_cache,
+            quantization_config=quantization_config,
+        )
+    
+    def _tokenize_dataset(self, dataset: Any, tokenizer: Any) -> Any:
+        """
+        Tokenize the training dataset.
+        
+        Results are cached as an Arrow file in the output directory, keyed on
+        the tokenizer, tokenization settings and the training file's size and mtime,
+        so re-running on unchanged data skips tokenization entirely.
+        """
+        # No padding here: the collator pads each batch to its longest
+        # sequence, so short examples don't carry max_seq_length of padding.
+        tokenize_kwargs = {
+            "truncation": True,
+            "max_length": self.config.max_seq_length,
+        }
+        
+        data_stat = os.stat(self.config.train_data_path)
+        cache_key = hashlib.md5(json.dumps([
+            self.config.base_model_path,
+            tokenize_kwargs,
+            os.path.abspath(self.config.train_data_path),
+            data_stat.st_size,
+            data_stat.st_mtime_ns,
+        ], sort_keys=True).encode()).hexdigest()
+        cache_file = os.path.join(self.config.output_dir, f"tok_cache_{cache_key}.arrow")
+        
+        # The in-process path reuses the tokenizer that is already loaded
+        _WORKER_TOKENIZERS.setdefault(self.config.base_model_path, tokenizer)
+        tokenize_function = functools.partial(
+            _tokenize_batch,
+            tokenizer_name=self.config.base_model_path,
+            max_length=self.config.max_seq_length,
+        )
+        
+        num_proc = min(8, os.cpu_count() or 1)
+        if num_proc == 1:
+            # A single process can use the Rust tokenizer's own thread pool;
+            # with worker processes it must stay off to avoid fork deadlocks.
+            os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+        
+        return dataset.map(
+            tokenize_function,
+            batched=True,
+            batch_size=1000,
+            num_proc=num_proc,
+            remove_columns=dataset.column_names,
+            cache_file_name=cache_file,
+            load_from_cache_file=True,
+        )
+    
+    def _compile_model(self, model: Any) -> Any:
+        """
+        Wrap the model with torch.compile when enabled and running on CUDA.
+        
+        Only used for packed batches: every batch is then max_seq_length long,
+        so the static graph compiles once and reduce-overhead mode replays
+        steps as CUDA graphs to cut kernel-launch latency. Dynamically padded
+        batches change length every step and would recompile and re-capture
+        each time, so they are never compiled. The caller keeps the
+        uncompiled model for save_pretrained().
+        """
+        torch = self._lazy_imports().torch
+        
+        if not self.config.torch_compile or not hasattr(torch, "compile") or not torch.cuda.is_available():
+            return model
+        return torch.compile(model, mode="reduce-overhead", dynamic=False)
+    
+    def _build_packed_trainer(
+        self,
+        model: Any,
+        tokenizer: Any,
+        dataset: Any,
+        training_args: Any,
+    ) -> Any:
+        """
+        Build a trainer that packs short examples into full-length sequences.
+        
+        With trl installed, SFTTrainer concatenates EOS-separated examples up
+        to max_seq_length so almost no tokens in a batch are padding, and the
+        model is compiled for those fixed-size batches. Without it, falls back
+        to an uncompiled Trainer over the dynamically padded dataset.
+        """
+        try:
+            from trl import SFTTrainer
+        except ImportError:
+            SFTTrainer = None
+        
+        if SFTTrainer is not None:
+            return SFTTrainer(
+                model=self._compile_model(model),
+                train_dataset=dataset,
+                args=training_args,
+                tokenizer=tokenizer,
+                packing=True,
+                max_seq_length=self.config.max_seq_length,
+                dataset_text_field="text",
+            )
+        
+        logger.info("trl not installed; training without sequence packing")
+        return self._build_trainer(model, tokenizer, dataset, training_args)
+    
+    def _build_trainer(
+        self,
+        model: Any,
+        tokenizer: Any,
+        dataset: Any,
+        training_args: Any,
+    ) -> Any:
+        """Build a plain Trainer over the tokenized, dynamically padded dataset."""
+        deps = self._lazy_imports()
+        return deps.Trainer(
+            model=model,
+            train_dataset=self._tokenize_dataset(dataset, tokenizer),
+            args=training_args,
+            # Pads dynamically per batch, aligned for tensor cores
+            data_collator=deps.DataCollatorForLanguageModeling(tokenizer, mlm=False, pad_to_multiple_of=16),
+        )
     
     def train(self) -> Dict[str, Any]:
         """
@@ -264,6 +652,9 @@ class NOCModelTrainer:
         if not self.config.train_data_path:
             raise ValueError("No training data provided. Call prepare_data() first.")
         
+        if self.config.method == "auto":
+            self.config.method = self._select_method()
+        
         self._is_training = True
         
         # Notify callbacks
@@ -291,310 +682,199 @@ class NOCModelTrainer:
     
     def _train_lora(self) -> Dict[str, Any]:
         """Train using LoRA method."""
-        try:
-            from transformers import (
-                AutoModelForCausalLM,
-                AutoTokenizer,
-                TrainingArguments,
-                Trainer,
-                DataCollatorForLanguageModeling,
-            )
-            from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
-            from datasets import load_dataset
-            import torch
-            
-            logger.info("Starting LoRA training...")
-            
-            # Load tokenizer
-            tokenizer = AutoTokenizer.from_pretrained(self.config.base_model_path)
-            tokenizer.pad_token = tokenizer.eos_token
-            
-            # Load model
-            model = AutoModelForCausalLM.from_pretrained(
-                self.config.base_model_path,
-                torch_dtype=torch.float16,
-                device_map="auto",
-            )
-            
-            # Prepare model for training
-            model = prepare_model_for_kbit_training(model)
-            
-            # Configure LoRA
-            lora_config = LoraConfig(
-                r=self.config.lora_r,
-                lora_alpha=self.config.lora_alpha,
-                target_modules=self.config.lora_target_modules,
-                lora_dropout=self.config.lora_dropout,
-                bias="none",
-                task_type="CAUSAL_LM",
-            )
-            
-            model = get_peft_model(model, lora_config)
-            model.print_trainable_parameters()
-            
-            # Load dataset
-            dataset = load_dataset('json', data_files=self.config.train_data_path, split='train')
-            
-            # Tokenize
-            def tokenize_function(examples):
-                return tokenizer(
-                    examples["text"],
-                    truncation=True,
-                    max_length=self.config.max_seq_length,
-                    padding="max_length",
-                )
-            
-            tokenized_dataset = dataset.map(tokenize_function, batched=True)
-            
-            # Training arguments
-            training_args = TrainingArguments(
-                output_dir=self.config.output_dir,
-                num_train_epochs=self.config.num_epochs,
-                per_device_train_batch_size=self.config.batch_size,
-                gradient_accumulation_steps=self.config.gradient_accumulation_steps,
-                optim=self.config.optimizer,
-                save_steps=self.config.save_steps,
-                logging_steps=self.config.logging_steps,
-                learning_rate=self.config.learning_rate,
-                weight_decay=self.config.weight_decay,
-                fp16=self.config.fp16,
-                bf16=self.config.bf16,
-                max_grad_norm=self.config.max_grad_norm,
-                max_steps=-1,
-                warmup_ratio=0.03,
-                group_by_length=True,
-                lr_scheduler_type=self.config.lr_scheduler,
-                report_to="none",
-                gradient_checkpointing=self.config.gradient_checkpointing,
-            )
-            
-            # Data collator
-            data_collator = DataCollatorForLanguageModeling(tokenizer, mlm=False)
-            
-            # Trainer
-            trainer = Trainer(
-                model=model,
-                train_dataset=tokenized_dataset,
-                args=training_args,
-                data_collator=data_collator,
-            )
-            
-            # Train
-            trainer.train()
-            
-            # Save
-            model.save_pretrained(os.path.join(self.config.output_dir, "final"))
-            tokenizer.save_pretrained(os.path.join(self.config.output_dir, "final"))
-            
-            return {
-                "status": "success",
-                "method": "lora",
-                "output_dir": self.config.output_dir,
-                "final_checkpoint": os.path.join(self.config.output_dir, "final"),
-            }
-            
-        except ImportError as e:
-            logger.error(f"Missing dependency: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Training failed: {e}")
-            raise
+        return self._train(self._lora_strategy())
     
     def _train_qlora(self) -> Dict[str, Any]:
         """Train using QLoRA (quantized LoRA) method."""
-        try:
-            from transformers import (
-                AutoModelForCausalLM,
-                AutoTokenizer,
-                BitsAndBytesConfig,
-                TrainingArguments,
-                Trainer,
-                DataCollatorForLanguageModeling,
-            )
-            from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
-            from datasets import load_dataset
-            import torch
-            
-            logger.info("Starting QLoRA training...")
-            
-            # Quantization config
-            bnb_config = BitsAndBytesConfig(
+        return self._train(self._qlora_strategy())
+    
+    def _train_full(self) -> Dict[str, Any]:
+        """Train using full fine-tuning."""
+        return self._train(self._full_strategy())
+    
+    def _lora_strategy(self) -> _TrainingStrategy:
+        """
+        LoRA adapters over a half-precision base, or int8 when the
+        half-precision weights don't fit in free VRAM.
+        
+        Gradient checkpointing is enabled on the base model here rather than
+        through TrainingArguments, so the Trainer doesn't re-enable it and
+        discard gradient_checkpointing_interval.
+        """
+        def load_model(torch_dtype: Any) -> Any:
+            deps = self._lazy_imports()
+            torch = deps.torch
+            
+            # Downgrade the frozen base weights to int8 when they don't fit;
+            # unknown sizes keep half precision
+            quantization_config = None
+            if torch.cuda.is_available():
+                free_bytes = torch.cuda.mem_get_info()[0]
+                weight_bytes = self._half_precision_weight_bytes()
+                if weight_bytes is not None and weight_bytes * _LORA_VRAM_HEADROOM >= free_bytes:
+                    logger.warning(
+                        f"~{weight_bytes / 1e9:.1f} GB weights but only {free_bytes / 1e9:.1f} GB "
+                        "VRAM free; loading base model in 8-bit for LoRA"
+                    )
+                    quantization_config = deps.BitsAndBytesConfig(
+                        load_in_8bit=True,
+                        llm_int8_threshold=6.0,
+                        llm_int8_has_fp16_weight=False,
+                    )
+            
+            model = self._load_model(torch_dtype, quantization_config)
+            if quantization_config is not None:
+                model = deps.prepare_model_for_kbit_training(
+                    model,
+                    use_gradient_checkpointing=self.config.gradient_checkpointing,
+                    gradient_checkpointing_kwargs={"use_reentrant": False},
+                )
+            elif self.config.gradient_checkpointing:
+                # prepare_model_for_kbit_training() would upcast every
+                # non-quantized parameter (norms, embeddings) to fp32, which on
+                # a half-precision base only adds memory; do the minimal prep.
+                self._enable_gradient_checkpointing(model)
+                model.enable_input_require_grads()
+            return self._apply_lora(model)
+        
+        return _TrainingStrategy(
+            method="lora",
+            description="LoRA training",
+            load_model=load_model,
+            optim=self.config.optimizer,
+            training_args={"max_steps": -1},
+        )
+    
+    def _qlora_strategy(self) -> _TrainingStrategy:
+        """LoRA adapters over a 4-bit NF4 quantized base."""
+        def load_model(torch_dtype: Any) -> Any:
+            deps = self._lazy_imports()
+            bnb_config = deps.BitsAndBytesConfig(
                 load_in_4bit=True,
                 bnb_4bit_quant_type="nf4",
-                bnb_4bit_compute_dtype=torch.float16,
+                bnb_4bit_compute_dtype=torch_dtype,
                 bnb_4bit_use_double_quant=True,
             )
-            
-            # Load tokenizer
-            tokenizer = AutoTokenizer.from_pretrained(self.config.base_model_path)
-            tokenizer.pad_token = tokenizer.eos_token
-            
-            # Load quantized model
-            model = AutoModelForCausalLM.from_pretrained(
-                self.config.base_model_path,
-                quantization_config=bnb_config,
-                device_map="auto",
-            )
-            
-            # Prepare model
-            model = prepare_model_for_kbit_training(model)
-            
-            # Configure LoRA
-            lora_config = LoraConfig(
-                r=self.config.lora_r,
-                lora_alpha=self.config.lora_alpha,
-                target_modules=self.config.lora_target_modules,
-                lora_dropout=self.config.lora_dropout,
-                bias="none",
-                task_type="CAUSAL_LM",
-            )
-            
-            model = get_peft_model(model, lora_config)
-            model.print_trainable_parameters()
-            
-            # Load dataset
-            dataset = load_dataset('json', data_files=self.config.train_data_path, split='train')
-            
-            # Tokenize
-            def tokenize_function(examples):
-                return tokenizer(
-                    examples["text"],
-                    truncation=True,
-                    max_length=self.config.max_seq_length,
-                    padding="max_length",
-                )
-            
-            tokenized_dataset = dataset.map(tokenize_function, batched=True)
-            
-            # Training arguments
-            training_args = TrainingArguments(
-                output_dir=self.config.output_dir,
-                num_train_epochs=self.config.num_epochs,
-                per_device_train_batch_size=self.config.batch_size,
-                gradient_accumulation_steps=self.config.gradient_accumulation_steps,
-                optim="paged_adamw_8bit",  # Optimized for QLoRA
-                save_steps=self.config.save_steps,
-                logging_steps=self.config.logging_steps,
-                learning_rate=self.config.learning_rate,
-                weight_decay=self.config.weight_decay,
-                fp16=True,
-                max_grad_norm=self.config.max_grad_norm,
-                warmup_ratio=0.03,
-                group_by_length=True,
-                lr_scheduler_type=self.config.lr_scheduler,
-                report_to="none",
-            )
-            
-            # Data collator
-            data_collator = DataCollatorForLanguageModeling(tokenizer, mlm=False)
-            
-            # Trainer
-            trainer = Trainer(
-                model=model,
-                train_dataset=tokenized_dataset,
-                args=training_args,
-                data_collator=data_collator,
+            model = self._load_model(torch_dtype, bnb_config)
+            model = deps.prepare_model_for_kbit_training(
+                model,
+                gradient_checkpointing_kwargs={"use_reentrant": False},
             )
-            
-            # Train
-            trainer.train()
-            
-            # Save
-            model.save_pretrained(os.path.join(self.config.output_dir, "final"))
-            tokenizer.save_pretrained(os.path.join(self.config.output_dir, "final"))
-            
-            return {
-                "status": "success",
-                "method": "qlora",
-                "output_dir": self.config.output_dir,
-                "final_checkpoint": os.path.join(self.config.output_dir, "final"),
-            }
-            
-        except ImportError as e:
-            logger.error(f"Missing dependency: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Training failed: {e}")
-            raise
-    
-    def _train_full(self) -> Dict[str, Any]:
-        """Train using full fine-tuning."""
+            return self._apply_lora(model)
+        
+        return _TrainingStrategy(
+            method="qlora",
+            description="QLoRA training",
+            load_model=load_model,
+            # Paged optimizers spill state to host RAM under memory spikes;
+            # 8-bit state saves VRAM on small cards, 32-bit converges
+            # better where there is room for it.
+            optim="paged_adamw_8bit" if self.config.max_memory_gb < 24 else "paged_adamw_32bit",
+        )
+    
+    def _full_strategy(self) -> _TrainingStrategy:
+        """All weights trainable; no adapters, packing or compilation."""
         logger.warning("Full fine-tuning requires significant GPU memory. Ensure you have sufficient VRAM.")
         
-        # For full fine-tuning, we use the same code as LoRA but without the PEFT wrapper
-        # This is a simplified version
+        def load_model(torch_dtype: Any) -> Any:
+            # No quantization for full fine-tuning
+            model = self._load_model(torch_dtype)
+            
+            # Enable gradient checkpointing to save memory
+            if self.config.gradient_checkpointing:
+                self._enable_gradient_checkpointing(model)
+            return model
+        
+        return _TrainingStrategy(
+            method="full",
+            description="full fine-tuning",
+            load_model=load_model,
+            optim=self.config.optimizer,
+            packed=False,
+        )
+    
+    def _enable_gradient_checkpointing(self, model: Any) -> None:
+        """
+        Enable non-reentrant gradient checkpointing on every k-th layer.
+        
+        Non-reentrant checkpointing recomputes activations through autograd
+        hooks instead of re-running each layer's forward pass under no_grad.
+        With gradient_checkpointing_interval=2 only every other decoder layer
+        is recomputed, roughly halving the recompute cost while keeping most
+        of the memory saving. Skipping layers relies on decoder layers having
+        their own gradient_checkpointing flag (recent transformers); older
+        releases checkpoint every layer.
+        """
+        model.gradient_checkpointing_enable(gradient_checkpointing_kwargs={"use_reentrant": False})
+        
+        interval = self.config.gradient_checkpointing_interval
+        if interval <= 1:
+            return
+        layers = getattr(getattr(model, "model", None), "layers", None) or []
+        for idx, layer in enumerate(layers):
+            if idx % interval and hasattr(layer, "gradient_checkpointing"):
+                layer.gradient_checkpointing = False
+    
+    def _apply_lora(self, model: Any) -> Any:
+        """Wrap the base model with trainable LoRA adapters."""
+        deps = self._lazy_imports()
+        lora_config = deps.LoraConfig(
+            r=self.config.lora_r,
+            lora_alpha=self.config.lora_alpha,
+            target_modules=self.config.lora_target_modules,
+            lora_dropout=self.config.lora_dropout,
+            bias="none",
+            task_type="CAUSAL_LM",
+        )
+        
+        model = deps.get_peft_model(model, lora_config)
+        model.print_trainable_parameters()
+        return model
+    
+    def _train(self, strategy: _TrainingStrategy) -> Dict[str, Any]:
+        """Run the shared load/tokenize/train/save pipeline for a strategy."""
         try:
-            from transformers import (
-                AutoModelForCausalLM,
-                AutoTokenizer,
-                TrainingArguments,
-                Trainer,
-                DataCollatorForLanguageModeling,
-            )
-            from datasets import load_dataset
-            import torch
+            deps = self._lazy_imports()
+            torch = deps.torch
             
-            logger.info("Starting full fine-tuning...")
+            logger.info(f"Starting {strategy.description}...")
             
             # Load tokenizer
-            tokenizer = AutoTokenizer.from_pretrained(self.config.base_model_path)
-            tokenizer.pad_token = tokenizer.eos_token
+            tokenizer = self._load_tokenizer()
             
-            # Load model (no quantization for full fine-tuning)
-            model = AutoModelForCausalLM.from_pretrained(
-                self.config.base_model_path,
-                torch_dtype=torch.float16,
-                device_map="auto",
-            )
-            
-            # Enable gradient checkpointing to save memory
-            if self.config.gradient_checkpointing:
-                model.gradient_checkpointing_enable()
+            # Load model
+            use_bf16 = self._use_bf16(torch)
+            model = strategy.load_model(torch.bfloat16 if use_bf16 else torch.float16)
             
             # Load dataset
-            dataset = load_dataset('json', data_files=self.config.train_data_path, split='train')
-            
-            # Tokenize
-            def tokenize_function(examples):
-                return tokenizer(
-                    examples["text"],
-                    truncation=True,
-                    max_length=self.config.max_seq_length,
-                    padding="max_length",
-                )
-            
-            tokenized_dataset = dataset.map(tokenize_function, batched=True)
+            dataset = deps.load_dataset('json', data_files=self.config.train_data_path, split='train')
             
             # Training arguments
-            training_args = TrainingArguments(
+            training_args = deps.TrainingArguments(
                 output_dir=self.config.output_dir,
                 num_train_epochs=self.config.num_epochs,
                 per_device_train_batch_size=self.config.batch_size,
                 gradient_accumulation_steps=self.config.gradient_accumulation_steps,
-                optim=self.config.optimizer,
+                optim=strategy.optim,
                 save_steps=self.config.save_steps,
                 logging_steps=self.config.logging_steps,
                 learning_rate=self.config.learning_rate,
                 weight_decay=self.config.weight_decay,
-                fp16=self.config.fp16,
-                bf16=self.config.bf16,
+                fp16=self.config.fp16 and not use_bf16,
+                bf16=use_bf16,
                 max_grad_norm=self.config.max_grad_norm,
                 warmup_ratio=0.03,
                 group_by_length=True,
                 lr_scheduler_type=self.config.lr_scheduler,
                 report_to="none",
+                **strategy.training_args,
             )
             
-            # Data collator
-            data_collator = DataCollatorForLanguageModeling(tokenizer, mlm=False)
-            
             # Trainer
-            trainer = Trainer(
-                model=model,
-                train_dataset=tokenized_dataset,
-                args=training_args,
-                data_collator=data_collator,
-            )
+            if strategy.packed:
+                trainer = self._build_packed_trainer(model, tokenizer, dataset, training_args)
+            else:
+                trainer = self._build_trainer(model, tokenizer, dataset, training_args)
             
             # Train
             trainer.train()
@@ -605,11 +885,14 @@ class NOCModelTrainer:
             
             return {
                 "status": "success",
-                "method": "full",
+                "method": strategy.method,
                 "output_dir": self.config.output_dir,
                 "final_checkpoint": os.path.join(self.config.output_dir, "final"),
             }
             
+        except ImportError as e:
+            logger.error(f"Missing dependency: {e}")
+            raise
         except Exception as e:
             logger.error(f"Training failed: {e}")
             raise
@@ -10,19 +10,167 @@ Integrates local LLM capabilities with the NOC detection system for:
 
 from __future__ import annotations
 
+import asyncio
+import csv
+import functools
+import hashlib
+import io
 import json
+import re
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
 import logging
 
-from ..llm import LLMRegistry, ModelConfig, ModelArchitecture, GenerationResult
-from ..llm.noc_training_data import NOCTrainingDataBuilder
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+from .._compat import DATACLASS_SLOTS
+from .llm import LLMRegistry, ModelConfig, ModelArchitecture, GenerationResult, JsonObjectScanner
+from .llm.noc_training_data import NOCTrainingDataBuilder
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# Static instructions and output schemas lead every prompt and the per-request
+# data follows, so backends with prefix caching (llama.cpp, Ollama, vLLM)
+# reuse the KV cache for the shared preamble across requests.
+_ALERT_SYSTEM_PROMPT = """Analyze the network alert below and provide a detailed assessment.
+
+Provide your analysis in this JSON format:
+{
+    "root_cause": "Primary cause of the issue",
+    "confidence": 85,
+    "impact": "Description of business/operational impact",
+    "immediate_actions": ["Action 1", "Action 2", "Action 3"],
+    "investigation_steps": ["Step 1", "Step 2"],
+    "prevention": "How to prevent recurrence"
+}
+
+"""
+
+_CORRELATION_SYSTEM_PROMPT = """Analyze the correlated network alerts below and identify the common root cause.
+
+Provide analysis in this JSON format:
+{
+    "common_root_cause": "Identified shared cause",
+    "confidence": 90,
+    "impact_chain": "How the issue propagates",
+    "primary_device": "Device where issue originated",
+    "resolution_strategy": "Strategy to resolve all alerts",
+    "affected_services": ["Service 1", "Service 2"]
+}
+
+"""
+
+_PREDICTION_SYSTEM_PROMPT = """Predict maintenance needs over the prediction horizon below based on historical metrics.
+
+Provide prediction in this JSON format:
+{
+    "predicted_issues": ["Issue 1", "Issue 2"],
+    "confidence": 75,
+    "timeline": "When issues are likely to occur",
+    "recommended_maintenance": ["Maintenance 1", "Maintenance 2"],
+    "risk_level": "High/Medium/Low",
+    "resource_needs": "Estimated resources required"
+}
+
+"""
+
+_HEALTH_SYSTEM_PROMPT = """Explain the device health score below in clear, actionable terms.
+
+Provide a brief natural language explanation (2-3 sentences) of what this score means and what actions should be taken.
+
+"""
+
+_RUNBOOK_SYSTEM_PROMPT = """Generate the next troubleshooting step for the issue below.
+
+Provide the next CLI command to run or action to take, specific to the given device type.
+
+"""
+
+
+# Adapters that pre-tokenize prompts (llama.cpp) cache the token ids of these
+# shared prefixes and only tokenize the per-request remainder
+_SYSTEM_PROMPTS = (
+    _ALERT_SYSTEM_PROMPT,
+    _CORRELATION_SYSTEM_PROMPT,
+    _PREDICTION_SYSTEM_PROMPT,
+    _HEALTH_SYSTEM_PROMPT,
+    _RUNBOOK_SYSTEM_PROMPT,
+)
+
+
+def _prompt_prefix(prompt: str) -> Optional[str]:
+    """Return the static system prompt a prompt starts with, if any."""
+    for prefix in _SYSTEM_PROMPTS:
+        if prompt.startswith(prefix):
+            return prefix
+    return None
+
+
+# Fenced JSON object in model output, with or without a json language tag;
+# the closing fence may be missing when generation stopped at the object
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*(?:```|$)", re.DOTALL)
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _compact_json(obj: Any) -> str:
+    """
+    Serialize prompt data as compact JSON.
+    
+    Indentation whitespace costs prompt tokens without adding information.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _format_history_columnar(history: List[Dict[str, Any]]) -> str:
+    """
+    Render metric samples as CSV: one header row, then one row per sample.
+    
+    Field names appear once instead of in every record, and floats are
+    rounded to two decimals; a sample missing a field leaves its cell empty.
+    """
+    fields: Dict[str, None] = {}
+    for sample in history:
+        fields.update(dict.fromkeys(sample))
+    
+    def cell(value: Any) -> Any:
+        if isinstance(value, float):
+            return f"{value:.2f}".rstrip("0").rstrip(".")
+        if isinstance(value, (dict, list)):
+            return _compact_json(value)
+        return value
+    
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(fields)
+    for sample in history:
+        writer.writerow([cell(sample.get(name, "")) for name in fields])
+    return out.getvalue().rstrip("\n")
+
+
+def _extract_json(text: str) -> Dict[str, Any]:
+    """
+    Parse the JSON object from model output.
+    
+    Uses the first fenced block when present, else the whole text.
+    Raises json.JSONDecodeError when neither parses.
+    """
+    match = _JSON_FENCE.search(text)
+    return _loads(match.group(1) if match else text)
+
+
+@dataclass(**DATACLASS_SLOTS)
 class LLMInsight:
     """Structured insight from LLM analysis."""
     insight_type: str  # root_cause, prediction, recommendation, correlation
@@ -36,6 +184,16 @@ class LLMInsight:
     generation_time_ms: float
 
 
+@dataclass
+class _BatchRequest:
+    """Prompt waiting in the dynamic batcher."""
+    model: Any
+    prompt: str
+    max_tokens: int
+    temperature: float
+    future: "asyncio.Future[GenerationResult]"
+
+
 class LLMDetectionIntegrator:
     """
     Integrates local LLM with the detection engine.
@@ -46,8 +204,18 @@ class LLMDetectionIntegrator:
     
     def __init__(self, default_model: Optional[str] = None):
         self.default_model = default_model
-        self._context_cache: Dict[str, List[Dict[str, Any]]] = {}
+        self._context_cache: Dict[str, Deque[Dict[str, Any]]] = {}
         self.max_context_items = 10
+        self.generation_timeout: Optional[float] = 120.0  # seconds, async API only
+        # One generation at a time per in-process model (async API)
+        self._model_locks: Dict[str, threading.Lock] = {}
+        self._insight_cache: "OrderedDict[str, LLMInsight]" = OrderedDict()
+        self.insight_cache_size = 1024
+        # Dynamic batching for adapters with generate_batch() (Ollama)
+        self.max_batch_size = 16
+        self.max_batch_latency_ms = 20.0
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_worker: Optional[asyncio.Task] = None
     
     def analyze_alert(
         self,
@@ -73,25 +241,38 @@ class LLMDetectionIntegrator:
             logger.warning("No LLM model available for analysis")
             return None
         
+        # Recurring alerts reuse the stored insight
+        cache_key = self._alert_cache_key(model.config.name, device_id, alert_data, metrics_snapshot)
+        cached = self._get_cached_insight(cache_key)
+        if cached:
+            self._update_context(device_id, {
+                "type": "alert_analysis",
+                "timestamp": time.time(),
+                "insight": cached
+            })
+            return cached
+        
         # Build prompt
         prompt = self._build_alert_analysis_prompt(
             device_id, alert_data, metrics_snapshot
         )
         
         # Generate with timing
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         try:
-            result = model.generate(
-                prompt=prompt,
+            result = self._generate_json(
+                model,
+                prompt,
                 max_tokens=1024,
                 temperature=0.3,  # Lower temp for factual analysis
             )
-            generation_time = (time.time() - start_time) * 1000
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e6
             
             # Parse structured output
             insight = self._parse_alert_analysis(
                 result, model.config.name, generation_time
             )
+            self._store_insight(cache_key, insight)
             
             # Update context cache
             self._update_context(device_id, {
@@ -106,6 +287,52 @@ class LLMDetectionIntegrator:
             logger.error(f"LLM analysis failed: {e}")
             return None
     
+    def analyze_alerts_batch(
+        self,
+        items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+        model_name: Optional[str] = None
+    ) -> List[Optional[LLMInsight]]:
+        """
+        Analyze a burst of alerts in one backend call.
+        
+        Args:
+            items: (device_id, alert_data, metrics_snapshot) per alert
+            model_name: Specific model to use (default if None)
+        
+        Returns:
+            One LLMInsight (or None on failure) per item, in order
+        
+        Cached alerts are answered directly; the rest go to the adapter's
+        generate_batch() when it has one, otherwise they run one by one.
+        """
+        model = self._get_model(model_name)
+        if not model:
+            logger.warning("No LLM model available for analysis")
+            return [None] * len(items)
+        
+        insights, pending = self._prepare_alert_batch(model, items)
+        if not pending:
+            return insights
+        
+        prompts = [prompt for _, _, prompt in pending]
+        start_ns = time.perf_counter_ns()
+        try:
+            generate_batch = getattr(model, "generate_batch", None)
+            if generate_batch is not None:
+                results = generate_batch(prompts, max_tokens=1024, temperature=0.3)
+            else:
+                results = [
+                    self._generate_json(model, prompt, max_tokens=1024, temperature=0.3)
+                    for prompt in prompts
+                ]
+        except Exception as e:
+            logger.error(f"LLM batch analysis failed: {e}")
+            return insights
+        generation_time = (time.perf_counter_ns() - start_ns) / 1e6
+        
+        self._finish_alert_batch(model, items, insights, pending, results, generation_time)
+        return insights
+    
     def correlate_incidents(
         self,
         incident_alerts: List[Dict[str, Any]],
@@ -128,19 +355,21 @@ class LLMDetectionIntegrator:
             return None
         
         prompt = self._build_correlation_prompt(incident_alerts, topology_info)
+        cache_key = self._cache_key("correlation", model.config.name, prompt)
+        cached = self._get_cached_insight(cache_key)
+        if cached:
+            return cached
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         try:
-            result = model.generate(
-                prompt=prompt,
-                max_tokens=1024,
-                temperature=0.3,
-            )
-            generation_time = (time.time() - start_time) * 1000
+            result = self._generate_json(model, prompt, max_tokens=1024, temperature=0.3)
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e6
             
-            return self._parse_correlation_analysis(
+            insight = self._parse_correlation_analysis(
                 result, model.config.name, generation_time
             )
+            self._store_insight(cache_key, insight)
+            return insight
             
         except Exception as e:
             logger.error(f"LLM correlation failed: {e}")
@@ -173,14 +402,10 @@ class LLMDetectionIntegrator:
             device_id, metric_history, days_ahead
         )
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         try:
-            result = model.generate(
-                prompt=prompt,
-                max_tokens=1024,
-                temperature=0.4,
-            )
-            generation_time = (time.time() - start_time) * 1000
+            result = self._generate_json(model, prompt, max_tokens=1024, temperature=0.4)
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e6
             
             return self._parse_prediction(
                 result, model.config.name, generation_time
@@ -215,6 +440,7 @@ class LLMDetectionIntegrator:
                 prompt=prompt,
                 max_tokens=512,
                 temperature=0.5,
+                prompt_prefix=_HEALTH_SYSTEM_PROMPT,
             )
             return result.text.strip()
             
@@ -256,6 +482,7 @@ class LLMDetectionIntegrator:
                 prompt=prompt,
                 max_tokens=256,
                 temperature=0.3,
+                prompt_prefix=_RUNBOOK_SYSTEM_PROMPT,
             )
             return result.text.strip()
             
@@ -263,6 +490,542 @@ class LLMDetectionIntegrator:
             logger.error(f"Runbook generation failed: {e}")
             return None
     
+    async def aanalyze_alert(
+        self,
+        device_id: str,
+        alert_data: Dict[str, Any],
+        metrics_snapshot: Dict[str, Any],
+        model_name: Optional[str] = None
+    ) -> Optional[LLMInsight]:
+        """
+        Async variant of analyze_alert().
+        
+        Generation runs without blocking the event loop, so calls can be
+        awaited concurrently with asyncio.gather(); see _agenerate() for
+        how calls to one local model are serialized.
+        """
+        model = self._get_model(model_name)
+        if not model:
+            logger.warning("No LLM model available for analysis")
+            return None
+        
+        cache_key = self._alert_cache_key(model.config.name, device_id, alert_data, metrics_snapshot)
+        cached = self._get_cached_insight(cache_key)
+        if cached:
+            self._update_context(device_id, {
+                "type": "alert_analysis",
+                "timestamp": time.time(),
+                "insight": cached
+            })
+            return cached
+        
+        prompt = self._build_alert_analysis_prompt(
+            device_id, alert_data, metrics_snapshot
+        )
+        
+        start_ns = time.perf_counter_ns()
+        try:
+            if getattr(model, "generate_batch", None) is not None:
+                # Coalesce concurrent alerts into batched backend calls
+                result = await self._batched_generate(model, prompt, max_tokens=1024, temperature=0.3)
+            else:
+                result = await self._agenerate(
+                    model, prompt, max_tokens=1024, temperature=0.3, json_output=True
+                )
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            insight = self._parse_alert_analysis(
+                result, model.config.name, generation_time
+            )
+            self._store_insight(cache_key, insight)
+            
+            self._update_context(device_id, {
+                "type": "alert_analysis",
+                "timestamp": time.time(),
+                "insight": insight
+            })
+            
+            return insight
+            
+        except Exception as e:
+            logger.error(f"LLM analysis failed: {e}")
+            return None
+    
+    async def aanalyze_alerts_batch(
+        self,
+        items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+        model_name: Optional[str] = None
+    ) -> List[Optional[LLMInsight]]:
+        """
+        Async variant of analyze_alerts_batch().
+        
+        Without a generate_batch() on the adapter, the uncached alerts are
+        generated concurrently with asyncio.gather() on thread_safe adapters
+        and one after another otherwise, as in analyze_alerts_batch().
+        """
+        model = self._get_model(model_name)
+        if not model:
+            logger.warning("No LLM model available for analysis")
+            return [None] * len(items)
+        
+        insights, pending = self._prepare_alert_batch(model, items)
+        if not pending:
+            return insights
+        
+        prompts = [prompt for _, _, prompt in pending]
+        start_ns = time.perf_counter_ns()
+        try:
+            generate_batch = getattr(model, "generate_batch", None)
+            if generate_batch is not None:
+                results = await asyncio.wait_for(
+                    asyncio.to_thread(generate_batch, prompts, max_tokens=1024, temperature=0.3),
+                    timeout=self.generation_timeout,
+                )
+            elif getattr(model, "thread_safe", False):
+                results = await asyncio.gather(*[
+                    self._agenerate(model, prompt, max_tokens=1024, temperature=0.3, json_output=True)
+                    for prompt in prompts
+                ], return_exceptions=True)
+            else:
+                # In-process models run one prompt at a time; each keeps its
+                # own generation_timeout instead of queueing behind the rest
+                results = []
+                for prompt in prompts:
+                    try:
+                        results.append(await self._agenerate(
+                            model, prompt, max_tokens=1024, temperature=0.3, json_output=True
+                        ))
+                    except Exception as e:
+                        results.append(e)
+        except Exception as e:
+            logger.error(f"LLM batch analysis failed: {e}")
+            return insights
+        generation_time = (time.perf_counter_ns() - start_ns) / 1e6
+        
+        self._finish_alert_batch(model, items, insights, pending, results, generation_time)
+        return insights
+    
+    async def acorrelate_incidents(
+        self,
+        incident_alerts: List[Dict[str, Any]],
+        topology_info: Dict[str, Any],
+        model_name: Optional[str] = None
+    ) -> Optional[LLMInsight]:
+        """Async variant of correlate_incidents()."""
+        model = self._get_model(model_name)
+        if not model:
+            return None
+        
+        prompt = self._build_correlation_prompt(incident_alerts, topology_info)
+        cache_key = self._cache_key("correlation", model.config.name, prompt)
+        cached = self._get_cached_insight(cache_key)
+        if cached:
+            return cached
+        
+        start_ns = time.perf_counter_ns()
+        try:
+            result = await self._agenerate(
+                model, prompt, max_tokens=1024, temperature=0.3, json_output=True
+            )
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            insight = self._parse_correlation_analysis(
+                result, model.config.name, generation_time
+            )
+            self._store_insight(cache_key, insight)
+            return insight
+            
+        except Exception as e:
+            logger.error(f"LLM correlation failed: {e}")
+            return None
+    
+    async def apredict_maintenance(
+        self,
+        device_id: str,
+        metric_history: List[Dict[str, Any]],
+        days_ahead: int = 7,
+        model_name: Optional[str] = None
+    ) -> Optional[LLMInsight]:
+        """Async variant of predict_maintenance()."""
+        model = self._get_model(model_name)
+        if not model:
+            return None
+        
+        prompt = self._build_prediction_prompt(
+            device_id, metric_history, days_ahead
+        )
+        
+        start_ns = time.perf_counter_ns()
+        try:
+            result = await self._agenerate(
+                model, prompt, max_tokens=1024, temperature=0.4, json_output=True
+            )
+            generation_time = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            return self._parse_prediction(
+                result, model.config.name, generation_time
+            )
+            
+        except Exception as e:
+            logger.error(f"LLM prediction failed: {e}")
+            return None
+    
+    async def aexplain_health_score(
+        self,
+        device_id: str,
+        health_score: float,
+        contributing_factors: Dict[str, float],
+        model_name: Optional[str] = None
+    ) -> str:
+        """Async variant of explain_health_score()."""
+        model = self._get_model(model_name)
+        if not model:
+            return f"Health Score: {health_score}/100"
+        
+        prompt = self._build_health_explanation_prompt(
+            device_id, health_score, contributing_factors
+        )
+        
+        try:
+            result = await self._agenerate(model, prompt, max_tokens=512, temperature=0.5)
+            return result.text.strip()
+            
+        except Exception as e:
+            logger.error(f"Health explanation failed: {e}")
+            return f"Health Score: {health_score}/100"
+    
+    async def agenerate_runbook_step(
+        self,
+        issue_type: str,
+        device_type: str,
+        current_step: int,
+        previous_outputs: List[str],
+        model_name: Optional[str] = None
+    ) -> Optional[str]:
+        """Async variant of generate_runbook_step()."""
+        model = self._get_model(model_name)
+        if not model:
+            return None
+        
+        prompt = self._build_runbook_prompt(
+            issue_type, device_type, current_step, previous_outputs
+        )
+        
+        try:
+            result = await self._agenerate(model, prompt, max_tokens=256, temperature=0.3)
+            return result.text.strip()
+            
+        except Exception as e:
+            logger.error(f"Runbook generation failed: {e}")
+            return None
+    
+    async def _agenerate(
+        self,
+        model,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        json_output: bool = False
+    ) -> GenerationResult:
+        """
+        Generate without blocking the event loop.
+        
+        Uses the adapter's native agenerate() when it has one; otherwise the
+        blocking generate() (or _generate_json() for JSON answers) runs in a
+        worker thread, holding the model's lock unless the adapter is
+        thread_safe, so concurrent callers queue instead of running one
+        llama.cpp/transformers model from several threads.
+        
+        generation_timeout covers the wait for the lock as well. A timeout
+        only abandons the await: a call still queued is skipped and a
+        cancellable stream stops at its next chunk, but a blocking
+        generate() already running finishes and keeps the lock until then.
+        """
+        prompt_prefix = _prompt_prefix(prompt)
+        cancel = threading.Event()
+        agenerate = getattr(model, "agenerate", None)
+        if agenerate is not None:
+            call = agenerate(
+                prompt=prompt, max_tokens=max_tokens, temperature=temperature, prompt_prefix=prompt_prefix
+            )
+        elif json_output:
+            call = asyncio.to_thread(self._call_locked, model, cancel, functools.partial(
+                self._generate_json, model, prompt, max_tokens=max_tokens, temperature=temperature, cancel=cancel
+            ))
+        else:
+            call = asyncio.to_thread(self._call_locked, model, cancel, functools.partial(
+                model.generate,
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                prompt_prefix=prompt_prefix,
+            ))
+        try:
+            return await asyncio.wait_for(call, timeout=self.generation_timeout)
+        finally:
+            # Nobody waits for the result any more once the await is over
+            cancel.set()
+    
+    def _model_lock(self, model) -> threading.Lock:
+        """Lock serializing generations on one model."""
+        return self._model_locks.setdefault(model.config.name, threading.Lock())
+    
+    def _call_locked(self, model, cancel: threading.Event, fn: Callable[[], Any]) -> Any:
+        """Run fn in a worker thread under the model's lock, unless cancelled first."""
+        if getattr(model, "thread_safe", False):
+            return fn()
+        with self._model_lock(model):
+            if cancel.is_set():
+                raise RuntimeError("Generation abandoned before it started")
+            return fn()
+    
+    async def _batched_generate(
+        self,
+        model,
+        prompt: str,
+        max_tokens: int,
+        temperature: float
+    ) -> GenerationResult:
+        """
+        Queue a prompt for the dynamic batcher and wait for its result.
+        
+        Prompts arriving within max_batch_latency_ms of each other share one
+        generate_batch() call, up to max_batch_size prompts.
+        """
+        loop = asyncio.get_running_loop()
+        if self._batch_worker is None or self._batch_worker.done() or self._batch_worker.get_loop() is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker = loop.create_task(self._run_batch_worker(self._batch_queue))
+        
+        request = _BatchRequest(model, prompt, max_tokens, temperature, loop.create_future())
+        await self._batch_queue.put(request)
+        return await asyncio.wait_for(request.future, timeout=self.generation_timeout)
+    
+    async def _run_batch_worker(self, queue: asyncio.Queue) -> None:
+        """Collect queued prompts into batches and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_batch_latency_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # One backend call per distinct model/generation settings
+            groups: Dict[Tuple[int, int, float], List[_BatchRequest]] = {}
+            for request in batch:
+                key = (id(request.model), request.max_tokens, request.temperature)
+                groups.setdefault(key, []).append(request)
+            for requests in groups.values():
+                await self._dispatch_batch(requests)
+    
+    async def _dispatch_batch(self, requests: List[_BatchRequest]) -> None:
+        """Run one generate_batch() call and resolve the waiting futures."""
+        first = requests[0]
+        try:
+            results = await asyncio.to_thread(self._call_locked, first.model, threading.Event(), functools.partial(
+                first.model.generate_batch,
+                [r.prompt for r in requests],
+                max_tokens=first.max_tokens,
+                temperature=first.temperature,
+            ))
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        
+        for request, result in zip(requests, results):
+            if not request.future.done():
+                request.future.set_result(result)
+    
+    async def aclose(self) -> None:
+        """Stop the dynamic batching worker, if running."""
+        if self._batch_worker is not None and not self._batch_worker.done():
+            self._batch_worker.cancel()
+            try:
+                await self._batch_worker
+            except asyncio.CancelledError:
+                pass
+        self._batch_worker = None
+        self._batch_queue = None
+    
+    def _generate_json(
+        self,
+        model,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        cancel: Optional[threading.Event] = None
+    ) -> GenerationResult:
+        """
+        Generate a JSON answer and stop as soon as the first object closes.
+        
+        The answers are small objects that usually close well before
+        max_tokens. Adapters that can halt decoding in-process (transformers
+        stopping criteria) do so inside generate(); adapters whose streams
+        stop decoding when closed (llama.cpp, Ollama) are streamed and closed
+        at the object's end. Anything else generates in full. The text is
+        cut after the object either way; finish_reason is "length" when it
+        never closed. A streamed answer also stops once cancel is set.
+        """
+        prompt_prefix = _prompt_prefix(prompt)
+        scanner = JsonObjectScanner()
+        
+        stops_itself = getattr(model, "stops_at_json_end", False)
+        if stops_itself or not getattr(model, "cancellable_stream", False):
+            result = model.generate(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                prompt_prefix=prompt_prefix,
+                stop_at_json_end=stops_itself,
+            )
+            end = scanner.feed(result.text)
+            if end < 0:
+                return replace(result, finish_reason="length")
+            return replace(result, text=result.text[:end], finish_reason="stop")
+        
+        start_ns = time.perf_counter_ns()
+        chunks: List[str] = []
+        stream = model.generate_stream(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            prompt_prefix=prompt_prefix,
+        )
+        try:
+            for chunk in stream:
+                if cancel is not None and cancel.is_set():
+                    break
+                end = scanner.feed(chunk)
+                if end >= 0:
+                    chunks.append(chunk[:end])
+                    break
+                chunks.append(chunk)
+        finally:
+            # Closing the generator is what stops the backend decoding
+            stream.close()
+        
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+        text = "".join(chunks)
+        tokens_generated = model.count_tokens(text)
+        return GenerationResult(
+            text=text,
+            tokens_generated=tokens_generated,
+            tokens_per_second=tokens_generated / elapsed if elapsed > 0 else 0.0,
+            prompt_tokens=len(model.tokenize(prompt)),
+            finish_reason="stop" if scanner.complete else "length",
+            model_name=model.config.name,
+        )
+    
+    def _prepare_alert_batch(
+        self,
+        model,
+        items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]
+    ) -> Tuple[List[Optional[LLMInsight]], List[Tuple[int, str, str]]]:
+        """
+        Answer cached alerts of a batch.
+        
+        Returns the per-item insights (None where not cached) and the
+        (index, cache_key, prompt) of every alert still to generate.
+        """
+        insights: List[Optional[LLMInsight]] = [None] * len(items)
+        pending = []
+        for index, (device_id, alert_data, metrics) in enumerate(items):
+            cache_key = self._alert_cache_key(model.config.name, device_id, alert_data, metrics)
+            cached = self._get_cached_insight(cache_key)
+            if cached:
+                insights[index] = cached
+                self._update_context(device_id, {
+                    "type": "alert_analysis",
+                    "timestamp": time.time(),
+                    "insight": cached
+                })
+            else:
+                prompt = self._build_alert_analysis_prompt(device_id, alert_data, metrics)
+                pending.append((index, cache_key, prompt))
+        return insights, pending
+    
+    def _finish_alert_batch(
+        self,
+        model,
+        items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+        insights: List[Optional[LLMInsight]],
+        pending: List[Tuple[int, str, str]],
+        results: List[Any],
+        generation_time: float
+    ) -> None:
+        """Parse, cache and record the generated results of a batch."""
+        for (index, cache_key, _), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                logger.error(f"LLM analysis failed: {result}")
+                continue
+            insight = self._parse_alert_analysis(result, model.config.name, generation_time)
+            self._store_insight(cache_key, insight)
+            insights[index] = insight
+            self._update_context(items[index][0], {
+                "type": "alert_analysis",
+                "timestamp": time.time(),
+                "insight": insight
+            })
+    
+    def _alert_cache_key(
+        self,
+        model_name: str,
+        device_id: str,
+        alert_data: Dict[str, Any],
+        metrics: Dict[str, Any]
+    ) -> str:
+        """
+        Cache key for an alert analysis.
+        
+        Ignores the alert timestamp and rounds numeric metrics to two
+        significant figures, so repeats of the same alert on the same device
+        with near-identical readings share one insight.
+        """
+        bucketed = {
+            k: float(f"{v:.2g}") if isinstance(v, (int, float)) and not isinstance(v, bool) else v
+            for k, v in metrics.items()
+        }
+        return self._cache_key("alert", model_name, [
+            device_id,
+            alert_data.get("type"),
+            alert_data.get("severity"),
+            alert_data.get("message"),
+            bucketed,
+        ])
+    
+    @staticmethod
+    def _cache_key(kind: str, model_name: str, payload: Any) -> str:
+        """Hash a request payload into an insight cache key."""
+        raw = json.dumps([kind, model_name, payload], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    def _get_cached_insight(self, key: str) -> Optional[LLMInsight]:
+        """Return a cached insight (marked as cached) or None on a miss."""
+        insight = self._insight_cache.get(key)
+        if insight is None:
+            return None
+        self._insight_cache.move_to_end(key)
+        return replace(
+            insight,
+            model_used=f"{insight.model_used}(cached)",
+            generation_time_ms=0.0,
+        )
+    
+    def _store_insight(self, key: str, insight: LLMInsight) -> None:
+        """Store an insight, evicting the least recently used beyond the limit."""
+        self._insight_cache[key] = insight
+        self._insight_cache.move_to_end(key)
+        while len(self._insight_cache) > self.insight_cache_size:
+            self._insight_cache.popitem(last=False)
+    
     def _get_model(self, model_name: Optional[str] = None):
         """Get LLM model instance."""
         name = model_name or self.default_model
@@ -283,26 +1046,14 @@ class LLMDetectionIntegrator:
         metrics: Dict[str, Any]
     ) -> str:
         """Build prompt for alert analysis."""
-        return f"""Analyze the following network alert and provide a detailed assessment.
-
-Device: {device_id}
+        return _ALERT_SYSTEM_PROMPT + f"""Device: {device_id}
 Alert Type: {alert_data.get('type', 'Unknown')}
 Severity: {alert_data.get('severity', 'Unknown')}
 Message: {alert_data.get('message', 'N/A')}
 Timestamp: {alert_data.get('timestamp', 'N/A')}
 
 Current Metrics:
-{json.dumps(metrics, indent=2)}
-
-Provide your analysis in this JSON format:
-{{
-    "root_cause": "Primary cause of the issue",
-    "confidence": 85,
-    "impact": "Description of business/operational impact",
-    "immediate_actions": ["Action 1", "Action 2", "Action 3"],
-    "investigation_steps": ["Step 1", "Step 2"],
-    "prevention": "How to prevent recurrence"
-}}
+{_compact_json(metrics)}
 
 Analysis:"""
     
@@ -312,27 +1063,15 @@ Analysis:"""
         topology: Dict[str, Any]
     ) -> str:
         """Build prompt for incident correlation."""
-        alerts_text = json.dumps(alerts, indent=2)
-        topology_text = json.dumps(topology, indent=2)
+        alerts_text = _compact_json(alerts)
+        topology_text = _compact_json(topology)
         
-        return f"""Analyze these correlated network alerts and identify the common root cause.
-
-Alerts:
+        return _CORRELATION_SYSTEM_PROMPT + f"""Alerts:
 {alerts_text}
 
 Network Topology:
 {topology_text}
 
-Provide analysis in this JSON format:
-{{
-    "common_root_cause": "Identified shared cause",
-    "confidence": 90,
-    "impact_chain": "How the issue propagates",
-    "primary_device": "Device where issue originated",
-    "resolution_strategy": "Strategy to resolve all alerts",
-    "affected_services": ["Service 1", "Service 2"]
-}}
-
 Analysis:"""
     
     def _build_prediction_prompt(
@@ -342,25 +1081,14 @@ Analysis:"""
         days: int
     ) -> str:
         """Build prompt for maintenance prediction."""
-        history_summary = json.dumps(history[-30:], indent=2)  # Last 30 data points
+        history_summary = _format_history_columnar(history[-30:])  # Last 30 data points
         
-        return f"""Predict maintenance needs for the next {days} days based on historical metrics.
+        return _PREDICTION_SYSTEM_PROMPT + f"""Device: {device_id}
+Prediction Horizon: next {days} days
 
-Device: {device_id}
-
-Historical Metrics (last 30 samples):
+Historical Metrics (last 30 samples, CSV with header row):
 {history_summary}
 
-Provide prediction in this JSON format:
-{{
-    "predicted_issues": ["Issue 1", "Issue 2"],
-    "confidence": 75,
-    "timeline": "When issues are likely to occur",
-    "recommended_maintenance": ["Maintenance 1", "Maintenance 2"],
-    "risk_level": "High/Medium/Low",
-    "resource_needs": "Estimated resources required"
-}}
-
 Prediction:"""
     
     def _build_health_explanation_prompt(
@@ -372,16 +1100,12 @@ Prediction:"""
         """Build prompt for health score explanation."""
         factors_text = "\n".join([f"- {k}: {v:.1f}%" for k, v in factors.items()])
         
-        return f"""Explain the following device health score in clear, actionable terms.
-
-Device: {device_id}
+        return _HEALTH_SYSTEM_PROMPT + f"""Device: {device_id}
 Health Score: {score}/100
 
 Contributing Factors:
 {factors_text}
 
-Provide a brief natural language explanation (2-3 sentences) of what this score means and what actions should be taken.
-
 Explanation:"""
     
     def _build_runbook_prompt(
@@ -394,17 +1118,13 @@ Explanation:"""
         """Build prompt for runbook step generation."""
         previous = "\n".join([f"{i+1}. {out}" for i, out in enumerate(previous_outputs)])
         
-        return f"""Generate the next troubleshooting step for the following issue.
-
-Issue Type: {issue_type}
+        return _RUNBOOK_SYSTEM_PROMPT + f"""Issue Type: {issue_type}
 Device Type: {device_type}
 Current Step: {step}
 
 Previous Steps and Results:
 {previous}
 
-Provide the next CLI command to run or action to take. Be specific to {device_type}.
-
 Next Step:"""
     
     def _parse_alert_analysis(
@@ -415,18 +1135,8 @@ Next Step:"""
     ) -> LLMInsight:
         """Parse LLM output into structured insight."""
         try:
-            # Try to extract JSON from output
-            text = result.text.strip()
-            
-            # Find JSON block
-            if "```json" in text:
-                json_str = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                json_str = text.split("```")[1].split("```")[0]
-            else:
-                json_str = text
-            
-            data = json.loads(json_str)
+            # Extract JSON from output
+            data = _extract_json(result.text)
             
             return LLMInsight(
                 insight_type="root_cause",
@@ -462,16 +1172,7 @@ Next Step:"""
     ) -> LLMInsight:
         """Parse correlation output into insight."""
         try:
-            text = result.text.strip()
-            
-            if "```json" in text:
-                json_str = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                json_str = text.split("```")[1].split("```")[0]
-            else:
-                json_str = text
-            
-            data = json.loads(json_str)
+            data = _extract_json(result.text)
             
             return LLMInsight(
                 insight_type="correlation",
@@ -506,16 +1207,7 @@ Next Step:"""
     ) -> LLMInsight:
         """Parse prediction output into insight."""
         try:
-            text = result.text.strip()
-            
-            if "```json" in text:
-                json_str = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                json_str = text.split("```")[1].split("```")[0]
-            else:
-                json_str = text
-            
-            data = json.loads(json_str)
+            data = _extract_json(result.text)
             
             return LLMInsight(
                 insight_type="prediction",
@@ -545,36 +1237,40 @@ Next Step:"""
     def _update_context(self, device_id: str, context_item: Dict[str, Any]) -> None:
         """Update context cache for device."""
         if device_id not in self._context_cache:
-            self._context_cache[device_id] = []
+            # Bounded: appending past max_context_items drops the oldest item
+            self._context_cache[device_id] = deque(maxlen=self.max_context_items)
         
         self._context_cache[device_id].append(context_item)
-        
-        # Keep only recent context
-        if len(self._context_cache[device_id]) > self.max_context_items:
-            self._context_cache[device_id] = self._context_cache[device_id][-self.max_context_items:]
     
     def get_context(self, device_id: str) -> List[Dict[str, Any]]:
         """Get recent context for device."""
-        return self._context_cache.get(device_id, [])
+        return list(self._context_cache.get(device_id, ()))
+
+
+# Fixed settings for NOC model configs; the sequence/mapping values are
+# copied per config so callers can't mutate the shared template
+_NOC_CONFIG_DEFAULTS: Dict[str, Any] = {
+    "context_length": 8192,
+    "max_tokens": 2048,
+    "temperature": 0.3,  # Lower for factual accuracy
+    "top_p": 0.9,
+    "top_k": 40,
+    "repetition_penalty": 1.1,
+}
+_NOC_STOP_SEQUENCES = ("<|endoftext|>", "<|im_end|>")
+_NOC_CUSTOM_PARAMS = {
+    "use_cache": True,
+    "noc_optimized": True,
+}
 
 
 def create_default_noc_model_config(name: str, architecture: str, model_path: str) -> ModelConfig:
     """Create a default model configuration for NOC use."""
-    arch = ModelArchitecture(architecture)
-    
     return ModelConfig(
         name=name,
-        architecture=arch,
+        architecture=ModelArchitecture(architecture),
         model_path=model_path,
-        context_length=8192,
-        max_tokens=2048,
-        temperature=0.3,  # Lower for factual accuracy
-        top_p=0.9,
-        top_k=40,
-        repetition_penalty=1.1,
-        stop_sequences=["<|endoftext|>", "<|im_end|>"],
-        custom_params={
-            "use_cache": True,
-            "noc_optimized": True,
-        }
+        stop_sequences=list(_NOC_STOP_SEQUENCES),
+        custom_params=dict(_NOC_CUSTOM_PARAMS),
+        **_NOC_CONFIG_DEFAULTS,
     )
@@ -7,13 +7,102 @@ impact scope, and escalation policies.
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
+import operator
+import re
+from types import MappingProxyType
+
+import numpy as np
+
+from autodetector._compat import DATACLASS_SLOTS
 
 logger = logging.getLogger(__name__)
 
+# Single comparison clause: "<metric> <op> <value>"
+_CLAUSE_RE = re.compile(r"^(\w+)\s*(==|>=|<=|>|<)\s*(\S+)$")
+
+_COMPARATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "==": operator.eq,
+}
+
+
+def _parse_condition(condition: str) -> List[List[Tuple[str, str, str]]]:
+    """
+    Parse a rule condition into (metric, op, literal) clauses.
+    
+    Conditions are comparison clauses joined with "and"/"or" ("and" binds
+    tighter); the result is a list of alternatives, each a list of clauses
+    that must all hold. Raises ValueError on an unsupported clause.
+    """
+    alternatives = []
+    for part in condition.strip().split(" or "):
+        clauses = []
+        for clause in part.split(" and "):
+            match = _CLAUSE_RE.match(clause.strip())
+            if not match:
+                raise ValueError(f"unsupported clause '{clause}'")
+            clauses.append(match.groups())
+        alternatives.append(clauses)
+    return alternatives
+
+
+def _compile_clause(metric: str, op: str, literal: str) -> Callable[[Dict[str, Any]], bool]:
+    """Compile one parsed clause into a predicate."""
+    # Boolean flags: a missing flag counts as healthy
+    if op == "==" and literal == "false":
+        return lambda metrics: not metrics.get(metric, True)
+    if op == "==" and literal == "true":
+        return lambda metrics: bool(metrics.get(metric, False))
+    
+    compare = _COMPARATORS[op]
+    value = float(literal)
+    return lambda metrics: compare(metrics.get(metric, 0), value)
+
+
+def _compile_condition(condition: str) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a rule condition into a predicate over a metrics dict.
+    
+    Parsing happens once here instead of on every evaluation; an
+    unparseable condition compiles to a predicate that never matches.
+    """
+    try:
+        alternatives = [
+            [_compile_clause(*clause) for clause in clauses]
+            for clauses in _parse_condition(condition)
+        ]
+    except ValueError as e:
+        logger.error(f"Failed to compile condition '{condition}': {e}")
+        return lambda metrics: False
+    
+    if len(alternatives) == 1 and len(alternatives[0]) == 1:
+        return alternatives[0][0]
+    return lambda metrics: any(all(clause(metrics) for clause in clauses) for clauses in alternatives)
+
+
+def _clause_mask(metrics: Mapping[str, Sequence[Any]], rows: int, metric: str, op: str, literal: str) -> np.ndarray:
+    """Evaluate one parsed clause over metric columns; missing cells act as in the scalar path."""
+    if metric not in metrics:
+        column = np.full(rows, np.nan)
+    else:
+        column = np.asarray(metrics[metric], dtype=float)
+    missing = np.isnan(column)
+    
+    if op == "==" and literal == "false":
+        return ~missing & (column == 0)
+    if op == "==" and literal == "true":
+        return ~missing & (column != 0)
+    return _COMPARATORS[op](np.where(missing, 0.0, column), float(literal))
+
 
 class SeverityLevel(Enum):
     """Standard severity levels."""
@@ -25,7 +114,21 @@ class SeverityLevel(Enum):
     EMERGENCY = "emergency"
 
 
-@dataclass
+# Channel used when no matching rule names any
+_DEFAULT_CHANNELS = ("telegram",)
+
+# Base score per severity level
+_SEVERITY_SCORES = {
+    SeverityLevel.INFO: 10,
+    SeverityLevel.LOW: 25,
+    SeverityLevel.MEDIUM: 50,
+    SeverityLevel.HIGH: 75,
+    SeverityLevel.CRITICAL: 90,
+    SeverityLevel.EMERGENCY: 100,
+}
+
+
+@dataclass(**DATACLASS_SLOTS)
 class SeverityResult:
     """Severity determination result."""
     level: SeverityLevel
@@ -36,16 +139,21 @@ class SeverityResult:
     sla_minutes: Optional[int]
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class SeverityRule:
-    """Rule for severity calculation."""
+    """Rule for severity calculation (immutable and hashable)."""
     name: str
     condition: str
     severity: SeverityLevel
     weight: int
     auto_escalate: bool = False
-    channels: List[str] = None
+    channels: Tuple[str, ...] = ()
     sla_minutes: Optional[int] = None
+    compiled: Optional[Callable[[Dict[str, Any]], bool]] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        if self.compiled is None:
+            object.__setattr__(self, "compiled", _compile_condition(self.condition))
 
 
 class AlertSeverityEngine:
@@ -60,20 +168,48 @@ class AlertSeverityEngine:
     - Historical patterns
     """
     
-    SEVERITY_SCORES = {
-        SeverityLevel.INFO: 10,
-        SeverityLevel.LOW: 25,
-        SeverityLevel.MEDIUM: 50,
-        SeverityLevel.HIGH: 75,
-        SeverityLevel.CRITICAL: 90,
-        SeverityLevel.EMERGENCY: 100,
-    }
+    SEVERITY_SCORES = _SEVERITY_SCORES
+    
+    _SEVERITY_COLORS = MappingProxyType({
+        SeverityLevel.INFO: "blue",
+        SeverityLevel.LOW: "green",
+        SeverityLevel.MEDIUM: "yellow",
+        SeverityLevel.HIGH: "orange",
+        SeverityLevel.CRITICAL: "red",
+        SeverityLevel.EMERGENCY: "purple",
+    })
+    
+    # Score thresholds at which each successive level starts
+    _THRESHOLDS = (20, 40, 65, 80, 95)
+    _LEVELS = (
+        SeverityLevel.INFO,
+        SeverityLevel.LOW,
+        SeverityLevel.MEDIUM,
+        SeverityLevel.HIGH,
+        SeverityLevel.CRITICAL,
+        SeverityLevel.EMERGENCY,
+    )
     
     def __init__(self):
-        self.rules: List[SeverityRule] = []
+        self._rules: Tuple[SeverityRule, ...] = ()
         self.device_criticality: Dict[str, int] = {}  # 1-10
+        # Rule positions by referenced metric, plus rules that can match
+        # with none of their metrics present; rebuilt whenever rules change
+        self._rule_index: Dict[str, List[int]] = {}
+        self._unconditional_rules: List[int] = []
         self._load_default_rules()
     
+    @property
+    def rules(self) -> Tuple[SeverityRule, ...]:
+        """Active rules, read-only; change them with add_custom_rule,
+        replace_rule, remove_rule or by assigning a new sequence."""
+        return self._rules
+    
+    @rules.setter
+    def rules(self, rules: Sequence[SeverityRule]) -> None:
+        self._rules = tuple(rules)
+        self._index_rules()
+    
     def _load_default_rules(self) -> None:
         """Load default severity rules."""
         self.rules = [
@@ -82,7 +218,7 @@ class AlertSeverityEngine:
                 condition="cpu_usage > 90",
                 severity=SeverityLevel.HIGH,
                 weight=30,
-                channels=["telegram", "email"]
+                channels=("telegram", "email")
             ),
             SeverityRule(
                 name="memory_critical",
@@ -90,7 +226,7 @@ class AlertSeverityEngine:
                 severity=SeverityLevel.CRITICAL,
                 weight=40,
                 auto_escalate=True,
-                channels=["telegram", "voice"],
+                channels=("telegram", "voice"),
                 sla_minutes=15
             ),
             SeverityRule(
@@ -99,7 +235,7 @@ class AlertSeverityEngine:
                 severity=SeverityLevel.CRITICAL,
                 weight=50,
                 auto_escalate=True,
-                channels=["telegram", "voice", "email"],
+                channels=("telegram", "voice", "email"),
                 sla_minutes=10
             ),
             SeverityRule(
@@ -107,7 +243,7 @@ class AlertSeverityEngine:
                 condition="interface_down > 0",
                 severity=SeverityLevel.HIGH,
                 weight=35,
-                channels=["telegram"]
+                channels=("telegram",)
             ),
             SeverityRule(
                 name="device_offline",
@@ -115,7 +251,7 @@ class AlertSeverityEngine:
                 severity=SeverityLevel.CRITICAL,
                 weight=60,
                 auto_escalate=True,
-                channels=["telegram", "voice"],
+                channels=("telegram", "voice"),
                 sla_minutes=5
             ),
             SeverityRule(
@@ -124,7 +260,7 @@ class AlertSeverityEngine:
                 severity=SeverityLevel.EMERGENCY,
                 weight=80,
                 auto_escalate=True,
-                channels=["telegram", "voice", "sms"],
+                channels=("telegram", "voice", "sms"),
                 sla_minutes=5
             ),
             SeverityRule(
@@ -132,14 +268,14 @@ class AlertSeverityEngine:
                 condition="bgp_flap_count > 3",
                 severity=SeverityLevel.HIGH,
                 weight=40,
-                channels=["telegram"]
+                channels=("telegram",)
             ),
             SeverityRule(
                 name="temperature_high",
                 condition="temperature > 80",
                 severity=SeverityLevel.HIGH,
                 weight=35,
-                channels=["telegram"]
+                channels=("telegram",)
             ),
         ]
     
@@ -162,23 +298,37 @@ class AlertSeverityEngine:
         Returns:
             SeverityResult with determination
         """
-        matching_rules = []
         reasons = []
+        base_score = _SEVERITY_SCORES[SeverityLevel.INFO]
+        escalated = False
+        channels = None  # built only once a matching rule has channels
+        sla = None
         
-        # Check each rule
-        for rule in self.rules:
-            if self._evaluate_condition(rule.condition, metrics):
-                matching_rules.append(rule)
-                reasons.append(f"Rule '{rule.name}' matched: {rule.condition}")
+        # Check only rules that reference a metric present in this alert
+        candidates = set(self._unconditional_rules)
+        for metric_name in metrics:
+            candidates.update(self._rule_index.get(metric_name, ()))
         
-        # Determine base severity
-        if matching_rules:
-            # Use highest severity
-            base_severity = max(matching_rules, key=lambda r: self.SEVERITY_SCORES[r.severity]).severity
-            base_score = max(self.SEVERITY_SCORES[r.severity] for r in matching_rules)
-        else:
-            base_severity = SeverityLevel.INFO
-            base_score = 10
+        # Aggregate matching rules in one pass
+        for position in sorted(candidates):
+            rule = self.rules[position]
+            if not self._evaluate_condition(rule, metrics):
+                continue
+            reasons.append(f"Rule '{rule.name}' matched: {rule.condition}")
+            
+            # Highest matching severity sets the base score
+            score = _SEVERITY_SCORES[rule.severity]
+            if score > base_score:
+                base_score = score
+            if rule.auto_escalate:
+                escalated = True
+            if rule.channels:
+                if channels is None:
+                    channels = set(rule.channels)
+                else:
+                    channels.update(rule.channels)
+            if rule.sla_minutes and (sla is None or rule.sla_minutes < sla):
+                sla = rule.sla_minutes
         
         # Adjust for device criticality
         criticality = device_criticality or self.device_criticality.get(device_id, 5)
@@ -190,83 +340,115 @@ class AlertSeverityEngine:
         # Determine final severity level
         final_severity = self._score_to_severity(final_score)
         
-        # Determine if escalated
-        escalated = any(r.auto_escalate for r in matching_rules)
-        
-        # Collect notification channels
-        channels = set()
-        sla = None
-        for rule in matching_rules:
-            if rule.channels:
-                channels.update(rule.channels)
-            if rule.sla_minutes and (sla is None or rule.sla_minutes < sla):
-                sla = rule.sla_minutes
-        
         return SeverityResult(
             level=final_severity,
             score=final_score,
             reasons=reasons,
             escalated=escalated,
-            notification_channels=list(channels) if channels else ["telegram"],
+            notification_channels=list(channels) if channels else list(_DEFAULT_CHANNELS),
             sla_minutes=sla
         )
     
-    def _evaluate_condition(self, condition: str, metrics: Dict[str, float]) -> bool:
-        """Evaluate a condition string against metrics."""
-        try:
-            # Simple condition parser
-            # Supports: metric > value, metric < value, metric == value, metric >= value, metric <= value
-            
-            condition = condition.strip()
-            
-            # Handle == false/true
-            if " == false" in condition:
-                metric = condition.split(" == false")[0].strip()
-                return not metrics.get(metric, True)
-            elif " == true" in condition:
-                metric = condition.split(" == true")[0].strip()
-                return metrics.get(metric, False)
-            
-            # Parse comparison operators
-            for op in [">=", "<=", ">", "<", "=="]:
-                if op in condition:
-                    parts = condition.split(op)
-                    if len(parts) == 2:
-                        metric = parts[0].strip()
-                        value = float(parts[1].strip())
-                        metric_value = metrics.get(metric, 0)
-                        
-                        if op == ">=":
-                            return metric_value >= value
-                        elif op == "<=":
-                            return metric_value <= value
-                        elif op == ">":
-                            return metric_value > value
-                        elif op == "<":
-                            return metric_value < value
-                        elif op == "==":
-                            return metric_value == value
-            
-            return False
+    def calculate_severity_batch(
+        self,
+        metrics: Mapping[str, Sequence[Any]],
+        device_ids: Sequence[str],
+        device_criticality: Optional[Sequence[Optional[int]]] = None
+    ) -> List[SeverityResult]:
+        """
+        Calculate severity for many devices at once.
+        
+        Args:
+            metrics: Metric columns, one value per device (a pandas
+                DataFrame or a dict of sequences); NaN marks a missing value
+            device_ids: Device identifier per row
+            device_criticality: Optional criticality per row (1-10)
+        
+        Returns:
+            One SeverityResult per row, matching calculate_severity()
+        """
+        rows = len(device_ids)
+        if not rows:
+            return []
+        
+        # (rules, rows) match matrix, one vectorized comparison per clause
+        matched = np.zeros((len(self.rules), rows), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            try:
+                for clauses in _parse_condition(rule.condition):
+                    mask = np.ones(rows, dtype=bool)
+                    for clause in clauses:
+                        mask &= _clause_mask(metrics, rows, *clause)
+                    matched[i] |= mask
+            except (TypeError, ValueError) as e:
+                logger.error(f"Failed to evaluate condition '{rule.condition}': {e}")
+        
+        rule_scores = np.array([_SEVERITY_SCORES[r.severity] for r in self.rules], dtype=int)
+        base_scores = np.where(matched, rule_scores[:, None], 10).max(axis=0, initial=10)
+        
+        criticality = np.array([
+            (device_criticality[n] if device_criticality is not None else None)
+            or self.device_criticality.get(device_id, 5)
+            for n, device_id in enumerate(device_ids)
+        ])
+        final_scores = np.minimum(100, base_scores + (criticality - 5) * 3)
+        level_indices = np.searchsorted(self._THRESHOLDS, final_scores, side="right")
+        
+        results = []
+        for n in range(rows):
+            matching_rules = [self.rules[i] for i in np.flatnonzero(matched[:, n])]
+            channels = None
+            sla = None
+            for rule in matching_rules:
+                if rule.channels:
+                    if channels is None:
+                        channels = set(rule.channels)
+                    else:
+                        channels.update(rule.channels)
+                if rule.sla_minutes and (sla is None or rule.sla_minutes < sla):
+                    sla = rule.sla_minutes
             
+            score = int(final_scores[n])
+            results.append(SeverityResult(
+                level=self._LEVELS[level_indices[n]],
+                score=score,
+                reasons=[f"Rule '{r.name}' matched: {r.condition}" for r in matching_rules],
+                escalated=any(r.auto_escalate for r in matching_rules),
+                notification_channels=list(channels) if channels else list(_DEFAULT_CHANNELS),
+                sla_minutes=sla
+            ))
+        
+        return results
+    
+    def _index_rules(self) -> None:
+        """Index rule positions by the metrics their conditions reference."""
+        index: Dict[str, List[int]] = defaultdict(list)
+        unconditional = []
+        for position, rule in enumerate(self.rules):
+            try:
+                metric_names = {clause[0] for clauses in _parse_condition(rule.condition) for clause in clauses}
+            except ValueError:
+                continue  # compiled to never match
+            for metric_name in metric_names:
+                index[metric_name].append(position)
+            # e.g. "latency < 5" matches an alert without a latency metric
+            if self._evaluate_condition(rule, {}):
+                unconditional.append(position)
+        
+        self._rule_index = dict(index)
+        self._unconditional_rules = unconditional
+    
+    def _evaluate_condition(self, rule: SeverityRule, metrics: Dict[str, float]) -> bool:
+        """Evaluate a rule's compiled condition against metrics."""
+        try:
+            return rule.compiled(metrics)
         except Exception as e:
-            logger.error(f"Failed to evaluate condition '{condition}': {e}")
+            logger.error(f"Failed to evaluate condition '{rule.condition}': {e}")
             return False
     
     def _score_to_severity(self, score: int) -> SeverityLevel:
         """Convert score to severity level."""
-        if score >= 95:
-            return SeverityLevel.EMERGENCY
-        elif score >= 80:
-            return SeverityLevel.CRITICAL
-        elif score >= 65:
-            return SeverityLevel.HIGH
-        elif score >= 40:
-            return SeverityLevel.MEDIUM
-        elif score >= 20:
-            return SeverityLevel.LOW
-        else:
-            return SeverityLevel.INFO
+        return self._LEVELS[bisect_right(self._THRESHOLDS, score)]
     
     def add_custom_rule(
         self,
@@ -285,12 +467,28 @@ class AlertSeverityEngine:
             severity=SeverityLevel(severity),
             weight=weight,
             auto_escalate=auto_escalate,
-            channels=channels or ["telegram"],
+            channels=tuple(channels or _DEFAULT_CHANNELS),
             sla_minutes=sla_minutes
         )
-        self.rules.append(rule)
+        self.rules = self._rules + (rule,)
         logger.info(f"Added custom severity rule: {name}")
     
+    def replace_rule(self, name: str, rule: SeverityRule) -> bool:
+        """Swap the rule called name for rule, keeping its position."""
+        for position, existing in enumerate(self._rules):
+            if existing.name == name:
+                self.rules = self._rules[:position] + (rule,) + self._rules[position + 1:]
+                return True
+        return False
+    
+    def remove_rule(self, name: str) -> bool:
+        """Drop every rule called name."""
+        kept = tuple(r for r in self._rules if r.name != name)
+        if len(kept) == len(self._rules):
+            return False
+        self.rules = kept
+        return True
+    
     def set_device_criticality(self, device_id: str, level: int) -> None:
         """Set criticality level for a device (1-10)."""
         self.device_criticality[device_id] = max(1, min(10, level))
@@ -311,12 +509,4 @@ class AlertSeverityEngine:
     
     def get_severity_color(self, level: SeverityLevel) -> str:
         """Get display color for severity level."""
-        colors = {
-            SeverityLevel.INFO: "blue",
-            SeverityLevel.LOW: "green",
-            SeverityLevel.MEDIUM: "yellow",
-            SeverityLevel.HIGH: "orange",
-            SeverityLevel.CRITICAL: "red",
-            SeverityLevel.EMERGENCY: "purple",
-        }
-        return colors.get(level, "white")
+        return self._SEVERITY_COLORS.get(level, "white")
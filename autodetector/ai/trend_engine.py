@@ -9,13 +9,63 @@ from __future__ import annotations
 
 import math
 import statistics
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from collections import deque
+from typing import Callable, Deque, List, Dict, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - optional speedup
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# Relative error budget of a long float64 cumulative sum; window variances
+# below this fraction of the running sum of squares are recomputed directly
+_CUMSUM_RTOL = 1e-9
+# Change ratios this close to the 3-sigma threshold are re-decided exactly;
+# far wider than the prefix sums' error, so ties such as integer data whose
+# ratio is exactly 3 cannot land on the wrong side
+_CHANGE_TIE_RTOL = 1e-6
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _linreg_kernel(x, y):  # pragma: no cover - compiled
+        """
+        Means and centered sums (sxx, sxy, syy) in one fused native loop.
+        
+        Raw sums are taken relative to the first sample (shifted-data
+        algorithm), which keeps epoch-second timestamps from cancelling
+        catastrophically when the centered sums are recovered.
+        """
+        n = x.shape[0]
+        kx = x[0]
+        ky = y[0]
+        sx = 0.0
+        sy = 0.0
+        sxx = 0.0
+        sxy = 0.0
+        syy = 0.0
+        for i in range(n):
+            dx = x[i] - kx
+            dy = y[i] - ky
+            sx += dx
+            sy += dy
+            sxx += dx * dx
+            sxy += dx * dy
+            syy += dy * dy
+        
+        mean_dx = sx / n
+        mean_dy = sy / n
+        return kx + mean_dx, ky + mean_dy, sxx - sx * mean_dx, sxy - sx * mean_dy, syy - sy * mean_dy
+else:
+    _linreg_kernel = None
+
 
 @dataclass
 class TrendResult:
@@ -41,6 +91,99 @@ class ForecastPoint:
     confidence: float
 
 
+@dataclass
+class RollingRegressor:
+    """
+    Sliding-window linear regression over cached sums.
+    
+    Each update adds the new sample's contribution to the running sums and
+    subtracts the evicted one, so slope/intercept/R-squared cost O(1) per
+    tick instead of a pass over the whole history. Sums are kept relative
+    to an origin sample and rebuilt from the window every `window` updates
+    to stop floating-point drift from accumulating.
+    """
+    window: int = 288
+    n: int = 0
+    sx: float = 0.0
+    sy: float = 0.0
+    sxx: float = 0.0
+    sxy: float = 0.0
+    syy: float = 0.0
+    samples: Deque[Tuple[float, float]] = field(default_factory=deque, repr=False)
+    _origin: Tuple[float, float] = field(default=(0.0, 0.0), repr=False)
+    _updates: int = field(default=0, repr=False)
+    
+    def __post_init__(self):
+        if self.window < 2:
+            raise ValueError("RollingRegressor window must be at least 2")
+        self.samples = deque(self.samples, maxlen=self.window)
+        self._rebuild()
+    
+    def __len__(self) -> int:
+        return self.n
+    
+    def update(self, t: float, v: float) -> None:
+        """Add a sample, evicting the oldest once the window is full."""
+        if self.n == self.window:
+            self._accumulate(*self.samples[0], -1.0)
+        self.samples.append((t, v))
+        self._accumulate(t, v, 1.0)
+        
+        self._updates += 1
+        if self._updates >= self.window:
+            self._rebuild()
+    
+    def extend(self, timestamps: List[float], values: List[float]) -> None:
+        """Feed a batch of samples in order."""
+        for t, v in zip(timestamps, values):
+            self.update(t, v)
+    
+    def slope(self) -> float:
+        denom = self.n * self.sxx - self.sx * self.sx
+        if self.n < 2 or denom <= 0:
+            return 0.0
+        return (self.n * self.sxy - self.sx * self.sy) / denom
+    
+    def intercept(self) -> float:
+        if self.n == 0:
+            return 0.0
+        ox, oy = self._origin
+        slope = self.slope()
+        return (self.sy - slope * self.sx) / self.n + oy - slope * ox
+    
+    def r_squared(self) -> float:
+        if self.n < 2:
+            return 0.0
+        ss_tot = self.syy - self.sy * self.sy / self.n
+        if ss_tot <= 0:
+            return 0.0
+        ss_res = max(0.0, ss_tot - self.slope() * (self.sxy - self.sx * self.sy / self.n))
+        return max(0.0, 1 - ss_res / ss_tot)
+    
+    def fit(self) -> Tuple[float, float, float]:
+        """Return (slope, intercept, r_squared), like TrendEngine._linear_regression."""
+        return self.slope(), self.intercept(), self.r_squared()
+    
+    def _accumulate(self, t: float, v: float, sign: float) -> None:
+        dx = t - self._origin[0]
+        dy = v - self._origin[1]
+        self.n += int(sign)
+        self.sx += sign * dx
+        self.sy += sign * dy
+        self.sxx += sign * dx * dx
+        self.sxy += sign * dx * dy
+        self.syy += sign * dy * dy
+    
+    def _rebuild(self) -> None:
+        """Recompute the sums exactly from the window, re-centred on its oldest sample."""
+        self._origin = self.samples[0] if self.samples else (0.0, 0.0)
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+        for t, v in self.samples:
+            self._accumulate(t, v, 1.0)
+        self._updates = 0
+
+
 class TrendEngine:
     """
     Trend detection and forecasting for metrics.
@@ -64,7 +207,8 @@ class TrendEngine:
         values: List[float],
         timestamps: Optional[List[float]] = None,
         warn_threshold: Optional[float] = None,
-        crit_threshold: Optional[float] = None
+        crit_threshold: Optional[float] = None,
+        regressor: Optional[RollingRegressor] = None
     ) -> Optional[TrendResult]:
         """
         Analyze trend in metric values.
@@ -74,6 +218,9 @@ class TrendEngine:
             timestamps: Optional timestamps (uses index if None)
             warn_threshold: Warning threshold for ETA
             crit_threshold: Critical threshold for ETA
+            regressor: Optional rolling regressor kept up to date by the
+                caller; its cached fit replaces the batch regression once
+                it holds min_history_points samples
         
         Returns:
             TrendResult or None if insufficient data
@@ -86,7 +233,10 @@ class TrendEngine:
             timestamps = list(range(len(values)))
         
         # Calculate linear regression
-        slope, intercept, r_squared = self._linear_regression(timestamps, values)
+        if regressor is not None and len(regressor) >= self.min_history_points:
+            slope, intercept, r_squared = regressor.fit()
+        else:
+            slope, intercept, r_squared = self._linear_regression(timestamps, values)
         
         # Determine direction
         if abs(slope) < 0.001:
@@ -131,6 +281,74 @@ class TrendEngine:
             recommendation=recommendation
         )
     
+    def analyze_trend_batch(
+        self,
+        values_matrix: np.ndarray,
+        timestamps: Optional[np.ndarray] = None,
+        warn_threshold: Optional[Union[float, np.ndarray]] = None,
+        crit_threshold: Optional[Union[float, np.ndarray]] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Fit a linear trend to many series at once.
+        
+        Args:
+            values_matrix: (D, N) array, one row per device/metric series
+            timestamps: (N,) shared or (D, N) per-row timestamps (index if None)
+            warn_threshold: Warning threshold for ETA, scalar or per-row
+            crit_threshold: Critical threshold for ETA, scalar or per-row
+        
+        Returns:
+            Dict of (D,) arrays: slope, intercept, r_squared, forecast_1h,
+            forecast_24h and eta (NaN where analyze_trend would give None),
+            or None if the series are shorter than min_history_points
+        """
+        Y = np.atleast_2d(np.asarray(values_matrix, dtype=np.float64))
+        if Y.shape[1] < self.min_history_points:
+            return None
+        
+        if timestamps is None:
+            timestamps = np.arange(Y.shape[1], dtype=np.float64)
+        X = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), Y.shape)
+        
+        mean_x = X.mean(axis=1)
+        mean_y = Y.mean(axis=1)
+        Xc = X - mean_x[:, None]
+        Yc = Y - mean_y[:, None]
+        
+        sxx = np.einsum("ij,ij->i", Xc, Xc)
+        sxy = np.einsum("ij,ij->i", Xc, Yc)
+        ss_tot = np.einsum("ij,ij->i", Yc, Yc)
+        
+        # Degenerate rows (constant timestamps) get slope 0 / intercept mean,
+        # as in _linear_regression
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(sxx != 0, sxy / sxx, 0.0)
+            intercept = mean_y - slope * mean_x
+            ss_res = np.maximum(ss_tot - slope * sxy, 0.0)
+            r_squared = np.where((sxx != 0) & (ss_tot > 0), 1 - ss_res / ss_tot, 0.0)
+        r_squared = np.maximum(r_squared, 0.0)
+        
+        last_time = X[:, -1]
+        forecast_1h = slope * (last_time + 1) + intercept
+        forecast_24h = slope * (last_time + 24) + intercept
+        
+        eta = np.full(Y.shape[0], np.nan)
+        threshold = crit_threshold if crit_threshold is not None else warn_threshold
+        if threshold is not None:
+            threshold = np.broadcast_to(np.asarray(threshold, dtype=np.float64), slope.shape)
+            moving = slope != 0
+            time_to_threshold = (threshold[moving] - intercept[moving]) / slope[moving] - last_time[moving]
+            eta[moving] = np.where(time_to_threshold > 0, time_to_threshold, np.nan)
+        
+        return {
+            "slope": slope,
+            "intercept": intercept,
+            "r_squared": r_squared,
+            "forecast_1h": forecast_1h,
+            "forecast_24h": forecast_24h,
+            "eta": eta,
+        }
+    
     def _linear_regression(
         self,
         x: List[float],
@@ -142,28 +360,34 @@ class TrendEngine:
         Returns:
             (slope, intercept, r_squared)
         """
-        n = len(x)
-        
-        mean_x = statistics.mean(x)
-        mean_y = statistics.mean(y)
-        
-        # Calculate slope
-        numerator = sum((xi - mean_x) * (yi - mean_y) for xi, yi in zip(x, y))
-        denominator = sum((xi - mean_x) ** 2 for xi in x)
+        xa = np.asarray(x, dtype=np.float64)
+        ya = np.asarray(y, dtype=np.float64)
         
-        if denominator == 0:
-            return 0, mean_y, 0
-        
-        slope = numerator / denominator
+        # Centered sums; the residual sum of squares follows from
+        # ss_tot - slope * sxy without a second pass over the data
+        if _linreg_kernel is not None:
+            mean_x, mean_y, sxx, sxy, ss_tot = _linreg_kernel(xa, ya)
+        else:
+            mean_x = xa.mean()
+            mean_y = ya.mean()
+            xc = xa - mean_x
+            yc = ya - mean_y
+            sxx = xc @ xc
+            sxy = xc @ yc
+            ss_tot = yc @ yc
+        
+        if sxx == 0:
+            return 0, float(mean_y), 0
+        
+        slope = sxy / sxx
         intercept = mean_y - slope * mean_x
         
         # Calculate R-squared
-        ss_res = sum((yi - (slope * xi + intercept)) ** 2 for xi, yi in zip(x, y))
-        ss_tot = sum((yi - mean_y) ** 2 for yi in y)
+        ss_res = max(0.0, ss_tot - slope * sxy)
         
         r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
         
-        return slope, intercept, max(0, r_squared)
+        return float(slope), float(intercept), max(0, float(r_squared))
     
     def _forecast_linear(
         self,
@@ -235,34 +459,32 @@ class TrendEngine:
         slope, intercept, r_squared = self._linear_regression(timestamps, values)
         
         # Calculate standard error
-        predictions = [slope * t + intercept for t in timestamps]
-        residuals = [v - p for v, p in zip(values, predictions)]
-        mse = statistics.mean(r ** 2 for r in residuals) if residuals else 0
-        std_error = math.sqrt(mse)
-        
-        # Generate forecasts
-        last_time = timestamps[-1]
-        forecasts = []
-        
-        for i in range(1, hours_ahead // interval_hours + 1):
-            forecast_time = last_time + i * interval_hours
-            forecast_value = slope * forecast_time + intercept
-            
-            # Confidence intervals widen over time
-            confidence_factor = math.sqrt(i) * 1.96  # 95% confidence
-            margin = confidence_factor * std_error
-            
-            confidence = max(0, r_squared * (1 - i * 0.02))  # Decay confidence
-            
-            forecasts.append(ForecastPoint(
-                timestamp=forecast_time,
-                value=forecast_value,
-                lower_bound=forecast_value - margin,
-                upper_bound=forecast_value + margin,
-                confidence=confidence
-            ))
-        
-        return forecasts
+        ts = np.asarray(timestamps, dtype=np.float64)
+        residuals = np.asarray(values, dtype=np.float64) - (slope * ts + intercept)
+        std_error = math.sqrt(residuals @ residuals / len(residuals))
+        
+        # Forecast grid; confidence intervals widen and confidence decays over time
+        steps = np.arange(1, hours_ahead // interval_hours + 1, dtype=np.float64)
+        forecast_times = timestamps[-1] + steps * interval_hours
+        forecast_values = slope * forecast_times + intercept
+        margins = np.sqrt(steps) * (1.96 * std_error)  # 95% confidence
+        confidences = np.maximum(0.0, r_squared * (1 - steps * 0.02))
+        
+        return [
+            ForecastPoint(
+                timestamp=t,
+                value=v,
+                lower_bound=v - m,
+                upper_bound=v + m,
+                confidence=c
+            )
+            for t, v, m, c in zip(
+                forecast_times.tolist(),
+                forecast_values.tolist(),
+                margins.tolist(),
+                confidences.tolist()
+            )
+        ]
     
     def detect_change_point(
         self,
@@ -278,18 +500,54 @@ class TrendEngine:
         if len(values) < window_size * 2:
             return None
         
-        # Calculate moving averages
-        for i in range(window_size, len(values) - window_size):
-            before_avg = statistics.mean(values[i-window_size:i])
-            after_avg = statistics.mean(values[i:i+window_size])
-            
-            before_std = statistics.stdev(values[i-window_size:i]) if window_size > 1 else 0
+        a = np.asarray(values, dtype=np.float64)
+        count = len(a) - 2 * window_size  # candidate indices i in [W, len - W)
+        if count <= 0:
+            return None
+        
+        # Rolling sums of every window from cumulative sums of the data shifted
+        # by its mean (shifted-data variance), so large offsets such as byte
+        # counters do not cancel catastrophically; the window ending at i is
+        # "before", the one starting at i is "after"
+        shift = a.mean()
+        d = a - shift
+        csum = np.concatenate(([0.0], np.cumsum(d)))
+        csum_sq = np.concatenate(([0.0], np.cumsum(d * d)))
+        rolling_sum = csum[window_size:] - csum[:-window_size]
+        rolling_mean = rolling_sum / window_size + shift
+        before_avg = rolling_mean[:count]
+        after_avg = rolling_mean[window_size:window_size + count]
+        
+        if window_size > 1:
+            sum_sq = (csum_sq[window_size:] - csum_sq[:-window_size])[:count]
+            var = (sum_sq - rolling_sum[:count] ** 2 / window_size) / (window_size - 1)
+            before_std = np.sqrt(np.maximum(var, 0.0))
             
-            # Check for significant change
-            if before_std > 0:
-                change = abs(after_avg - before_avg) / before_std
-                if change > 3:  # 3 sigma change
-                    return i
+            # A window with no value changes is exactly flat; zero it rather
+            # than trust the rounding residue left in its variance. Windows
+            # whose spread is within the prefix sums' rounding error are
+            # rare and get an exact two-pass recompute instead.
+            steps = np.concatenate(([0], np.cumsum(a[1:] != a[:-1])))
+            flat = (steps[window_size - 1:] - steps[:-window_size + 1])[:count] == 0
+            noise = _CUMSUM_RTOL * csum_sq[window_size:window_size + count]
+            for j in np.flatnonzero(~flat & (var * (window_size - 1) <= noise)):
+                before_std[j] = a[j:j + window_size].std(ddof=1)
+            before_std[flat] = 0.0
+        else:
+            before_std = np.zeros(count)
+        
+        # Check for significant change (3 sigma), ignoring flat windows
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.abs(after_avg - before_avg) / np.where(before_std > 0, before_std, np.inf)
+        hits = change > 3
+        for j in np.flatnonzero(np.abs(change - 3) <= 3 * _CHANGE_TIE_RTOL):
+            i = int(j) + window_size
+            before = values[i - window_size:i]
+            ratio = abs(statistics.mean(values[i:i + window_size]) - statistics.mean(before)) / statistics.stdev(before)
+            hits[j] = ratio > 3
+        first = np.flatnonzero(hits)
+        if first.size:
+            return int(first[0]) + window_size
         
         return None
 
@@ -297,10 +555,18 @@ class TrendEngine:
 class DiskMemoryPredictor:
     """
     Specialized predictor for disk full and memory leak detection.
+    
+    An optional suppression_check(device_id, variable) -> bool, e.g. from
+    autodetector.alerting.maintenance.suppression_checker, skips the
+    regression entirely for devices in a silence or maintenance window.
     """
     
-    def __init__(self):
+    def __init__(self, suppression_check: Optional[Callable[[str, str], bool]] = None):
         self.trend_engine = TrendEngine()
+        self.suppression_check = suppression_check
+    
+    def _suppressed(self, device_id: Optional[str], variable: str) -> bool:
+        return bool(device_id and self.suppression_check and self.suppression_check(device_id, variable))
     
     def predict_disk_full(
         self,
@@ -308,7 +574,10 @@ class DiskMemoryPredictor:
         timestamps: List[float],
         total_capacity_gb: float,
         warn_percent: float = 85,
-        crit_percent: float = 95
+        crit_percent: float = 95,
+        regressor: Optional[RollingRegressor] = None,
+        device_id: Optional[str] = None,
+        variable: str = "disk_usage"
     ) -> Dict:
         """
         Predict when disk will be full.
@@ -319,13 +588,17 @@ class DiskMemoryPredictor:
         if not usage_history:
             return {"error": "No data available"}
         
+        if self._suppressed(device_id, variable):
+            return {"suppressed": True, "recommendation": "Alerts suppressed (silence/maintenance); prediction skipped."}
+        
         current_percent = usage_history[-1]
         
         trend = self.trend_engine.analyze_trend(
             usage_history,
             timestamps,
             warn_threshold=warn_percent,
-            crit_threshold=crit_percent
+            crit_threshold=crit_percent,
+            regressor=regressor
         )
         
         if not trend:
@@ -359,7 +632,10 @@ class DiskMemoryPredictor:
         self,
         memory_history: List[float],
         timestamps: List[float],
-        process_name: Optional[str] = None
+        process_name: Optional[str] = None,
+        regressor: Optional[RollingRegressor] = None,
+        device_id: Optional[str] = None,
+        variable: str = "memory_usage"
     ) -> Dict:
         """
         Detect potential memory leak.
@@ -370,7 +646,10 @@ class DiskMemoryPredictor:
         if len(memory_history) < 20:
             return {"error": "Need at least 20 data points for leak detection"}
         
-        trend = self.trend_engine.analyze_trend(memory_history, timestamps)
+        if self._suppressed(device_id, variable):
+            return {"suppressed": True, "recommendation": "Alerts suppressed (silence/maintenance); leak check skipped."}
+        
+        trend = self.trend_engine.analyze_trend(memory_history, timestamps, regressor=regressor)
         
         if not trend:
             return {"error": "Could not analyze trend"}
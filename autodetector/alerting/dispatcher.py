@@ -1,26 +1,24 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from autodetector.alerting.maintenance import is_suppressed
-from autodetector.alerting.routing import contact_group, route_alert
-from autodetector.integrations.telegram import send_telegram_message
+from autodetector.alerting.models import NormalizedAlert, normalize_alert
+from autodetector.alerting.routing import Route, contact_group, route_alert
+from autodetector.alerting.rules import compile_alerting
+from autodetector.integrations.telegram import send_telegram_messages
 from autodetector.integrations.voice_call import trigger_voice_call
 from autodetector.storage.sqlite_store import SqliteStore
 
 
 def _cooldown_sec(cfg: Any, severity: str) -> int:
-    raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
-    c = ((raw_cfg.get("alerting") or {}).get("cooldown_by_severity") or {})
-    return int(c.get(severity, (raw_cfg.get("alerting") or {}).get("cooldown_sec", 300)))
+    return compile_alerting(cfg).cooldown_sec(severity)
 
 
-def _critical_after_n(cfg: Any, alert: Dict[str, Any], saved_alert: Dict[str, Any]) -> Dict[str, Any]:
-    raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
-    pol = ((raw_cfg.get("alerting") or {}).get("critical_after_n") or {})
-    n = int(pol.get(str(alert.get("alert_type", "")), pol.get("default", 0)) or 0)
-    if n > 0 and int(saved_alert.get("count", 1)) >= n:
+def _critical_after_n(cfg: Any, alert: NormalizedAlert, saved_alert: Dict[str, Any]) -> Dict[str, Any]:
+    n = compile_alerting(cfg).critical_after_n(alert.alert_type)
+    if n > 0 and alert.count >= n:
         saved_alert["severity"] = "critical"
         saved_alert["message"] = f"(Escalated after {n} repeats) {saved_alert.get('message', '')}"
     return saved_alert
@@ -35,61 +33,80 @@ def dispatch_alerts(
 ) -> List[Dict[str, Any]]:
     device_tags = device.get("tags") or []
 
+    raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
+    bot_token = ((raw_cfg.get("integrations") or {}).get("telegram") or {}).get("bot_token")
+
+    assistant_cfg = ((raw_cfg.get("integrations") or {}).get("assistant") or {})
+    ai_summary_model = ""
+    if bool(assistant_cfg.get("enabled", False)) and bool(assistant_cfg.get("append_ai_summary", False)):
+        ai_summary_model = str(assistant_cfg.get("model", "") or "").strip()
+
+    # Device tags are fixed for the call, so routing depends only on these two
+    routes: Dict[Tuple[str, str], Route] = {}
+
+    # Sends are collected and issued after the loop: Telegram messages go out
+    # concurrently, then voice calls one at a time (carrier concurrency limits)
+    telegram_batch: List[Tuple[Optional[str], str]] = []
+    voice_batch: List[str] = []
+    events: List[Tuple[str, str, str, str]] = []
+
     delivered: List[Dict[str, Any]] = []
 
     for a in alerts:
-        dec = is_suppressed(cfg, a, device_tags=device_tags, now=now)
+        na = normalize_alert(a)
+
+        dec = is_suppressed(cfg, na, device_tags=device_tags, now=now)
         if dec.suppressed:
-            store.insert_alert_event(alert_id=a.get("id", ""), action="suppressed", actor="system", note=dec.reason)
+            events.append((na.id, "suppressed", "system", dec.reason))
             continue
 
-        cd = _cooldown_sec(cfg, str(a.get("severity", "info")))
+        cd = _cooldown_sec(cfg, na.severity or "info")
         a["cooldown_sec"] = cd
 
-        rt = route_alert(cfg, a, device_tags=device_tags)
+        rt = routes.get((na.variable, na.severity))
+        if rt is None:
+            rt = routes[(na.variable, na.severity)] = route_alert(cfg, na, device_tags=device_tags)
         grp = contact_group(cfg, rt.contact_group)
 
-        a = _critical_after_n(cfg, a, a)
-
-        msg = f"[{a.get('severity')}] {a.get('device_id')} {a.get('variable')} {a.get('alert_type')}\n{a.get('message')}"
-
-        raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
-        assistant_cfg = ((raw_cfg.get("integrations") or {}).get("assistant") or {})
-        if bool(assistant_cfg.get("enabled", False)) and bool(assistant_cfg.get("append_ai_summary", False)):
-            model_name = str(assistant_cfg.get("model", "") or "").strip()
-            if model_name:
-                try:
-                    from autodetector.assistant.llm_assistant import AssistantConfig, generate_assistant_response
-
-                    acfg = AssistantConfig(model_name=model_name, max_tokens=200, temperature=0.2)
-                    resp = generate_assistant_response(
-                        acfg,
-                        instruction=(
-                            "Summarize this alert and give the top 3 troubleshooting steps. "
-                            "Keep it short and actionable."
-                        ),
-                        input_data={"device": device, "alert": a},
-                    )
-                    ai_txt = (resp.text or "").strip()
-                    if ai_txt:
-                        msg = msg + "\n\nAI Summary:\n" + ai_txt
-                except Exception:
-                    pass
+        a = _critical_after_n(cfg, na, a)
+        if a.get("message") != na.message:  # escalated: severity/message rewritten
+            na = normalize_alert(a)
+
+        msg = f"[{na.severity}] {na.device_id} {na.variable} {na.alert_type}\n{na.message}"
+
+        if ai_summary_model:
+            try:
+                from autodetector.assistant.llm_assistant import AssistantConfig, generate_assistant_response
+
+                acfg = AssistantConfig(model_name=ai_summary_model, max_tokens=200, temperature=0.2)
+                resp = generate_assistant_response(
+                    acfg,
+                    instruction=(
+                        "Summarize this alert and give the top 3 troubleshooting steps. "
+                        "Keep it short and actionable."
+                    ),
+                    input_data={"device": device, "alert": a},
+                )
+                ai_txt = (resp.text or "").strip()
+                if ai_txt:
+                    msg = msg + "\n\nAI Summary:\n" + ai_txt
+            except Exception:
+                pass
 
         if "telegram" in rt.channels:
             chat_id = grp.get("telegram_chat_id")
-            bot_token = ((cfg.raw.get("integrations") or {}).get("telegram") or {}).get("bot_token")
-            if chat_id and bot_token:
-                cfg2 = cfg
-                cfg2.raw.setdefault("integrations", {}).setdefault("telegram", {})["chat_id"] = chat_id
-                send_telegram_message(cfg2, msg)
-            else:
-                send_telegram_message(cfg, msg)
-
-        if "voice_call" in rt.channels and str(a.get("severity")) == "critical":
-            trigger_voice_call(cfg, msg)
-
-        store.insert_alert_event(alert_id=a.get("id", ""), action="dispatched", actor="system", note=f"group={rt.contact_group} channels={','.join(rt.channels)}")
+            telegram_batch.append((str(chat_id) if chat_id and bot_token else None, msg))
+
+        if "voice_call" in rt.channels and na.severity == "critical":
+            voice_batch.append(msg)
+
+        events.append((na.id, "dispatched", "system", f"group={rt.contact_group} channels={','.join(rt.channels)}"))
         delivered.append(a)
 
+    store.insert_alert_events_bulk(events)
+
+    send_telegram_messages(cfg, telegram_batch)
+    for msg in voice_batch:
+        trigger_voice_call(cfg, msg)
+
     return delivered
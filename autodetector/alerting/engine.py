@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from autodetector.storage.sqlite_store import SqliteStore
 
+# Last-seen time of recently emitted alerts, keyed by (db_path, dedupe_key), so
+# the cooldown check rarely needs SQLite. Assumes this process is the only
+# writer of alerts for the store; misses fall through to the indexed lookup.
+_DEDUPE_LAST_SEEN: "OrderedDict[Tuple[str, str], datetime]" = OrderedDict()
+_DEDUPE_CACHE_MAX = 10_000
+_DEDUPE_LOCK = threading.Lock()
+
 
 def build_dedupe_key(alert: Dict[str, Any], fields: List[str]) -> str:
     parts = []
@@ -13,21 +22,39 @@ def build_dedupe_key(alert: Dict[str, Any], fields: List[str]) -> str:
     return "|".join(parts)
 
 
-def should_emit_alert(store: SqliteStore, alert: Dict[str, Any], cooldown_sec: int) -> bool:
-    key = alert["dedupe_key"]
-    existing = None
-    for a in store.list_alerts(limit=200):
-        if a.get("dedupe_key") == key:
-            existing = a
-            break
+def _remember_last_seen(store: SqliteStore, key: str, last_seen: datetime) -> None:
+    ck = (store.db_path, key)
+    with _DEDUPE_LOCK:
+        _DEDUPE_LAST_SEEN[ck] = last_seen
+        _DEDUPE_LAST_SEEN.move_to_end(ck)
+        if len(_DEDUPE_LAST_SEEN) > _DEDUPE_CACHE_MAX:
+            _DEDUPE_LAST_SEEN.popitem(last=False)
 
-    if not existing:
-        return True
 
+def record_alert_emitted(store: SqliteStore, alert: Dict[str, Any]) -> None:
+    """Note an alert just written by store.upsert_alert for later cooldown checks."""
     try:
-        last = datetime.fromisoformat(existing["last_seen_ts"])
+        last = datetime.fromisoformat(alert["ts"])
     except Exception:  # noqa: BLE001
-        return True
+        return
+    _remember_last_seen(store, alert["dedupe_key"], last)
+
+
+def should_emit_alert(store: SqliteStore, alert: Dict[str, Any], cooldown_sec: int) -> bool:
+    key = alert["dedupe_key"]
+    with _DEDUPE_LOCK:
+        last = _DEDUPE_LAST_SEEN.get((store.db_path, key))
+
+    if last is None:
+        existing = store.get_alert_by_dedupe_key(key)
+        if not existing:
+            return True
+
+        try:
+            last = datetime.fromisoformat(existing["last_seen_ts"])
+        except Exception:  # noqa: BLE001
+            return True
+        _remember_last_seen(store, key, last)
 
     now = datetime.now(timezone.utc)
     delta = (now - last).total_seconds()
@@ -35,4 +62,3 @@ def should_emit_alert(store: SqliteStore, alert: Dict[str, Any], cooldown_sec: i
         return True
 
     return False
-
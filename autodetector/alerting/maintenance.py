@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from autodetector.alerting.models import NormalizedAlert, variable_and_severity
+from autodetector.alerting.rules import compile_alerting
 
 
 @dataclass(frozen=True)
@@ -11,62 +14,60 @@ class SilenceDecision:
     reason: str
 
 
-def _parse_iso(ts: str) -> Optional[datetime]:
-    try:
-        dt = datetime.fromisoformat(ts)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-    except Exception:  # noqa: BLE001
-        return None
-
-
-def _tags_match(rule_tags: List[str], device_tags: List[str]) -> bool:
-    if not rule_tags:
-        return True
-    s = set(t.lower() for t in (device_tags or []))
-    return any(rt.lower() in s for rt in rule_tags)
+def is_suppressed(cfg: Any, alert: Union[NormalizedAlert, Dict[str, Any]], device_tags: List[str], now: datetime) -> SilenceDecision:
+    rules = compile_alerting(cfg)
+    if not rules.silences and not rules.maintenance_windows:
+        return SilenceDecision(False, "")
 
+    tags = rules.device_bits(device_tags)
+    var, sev = variable_and_severity(alert)
 
-def is_suppressed(cfg: Any, alert: Dict[str, Any], device_tags: List[str], now: datetime) -> SilenceDecision:
-    raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
-    acfg = raw_cfg.get("alerting") or {}
-
-    var = str(alert.get("variable", ""))
-    sev = str(alert.get("severity", ""))
-
-    for s in (acfg.get("silences") or []):
-        rule_tags = [str(x) for x in (s.get("tags") or [])]
-        if not _tags_match(rule_tags, device_tags):
+    for s in rules.silences:
+        if not s.tags_match(tags):
             continue
-
-        variables = [str(x) for x in (s.get("variables") or [])]
-        if variables and var not in variables:
+        if s.variables and var not in s.variables:
             continue
-
-        severities = [str(x) for x in (s.get("severities") or [])]
-        if severities and sev not in severities:
+        if s.severities and sev not in s.severities:
             continue
-
-        start = _parse_iso(str(s.get("start_ts", "")))
-        end = _parse_iso(str(s.get("end_ts", "")))
-        if start and now < start:
+        if s.start and now < s.start:
             continue
-        if end and now > end:
+        if s.end and now > s.end:
             continue
 
-        return SilenceDecision(True, str(s.get("reason", "silenced")))
+        return SilenceDecision(True, s.reason)
 
-    for mw in (acfg.get("maintenance_windows") or []):
-        rule_tags = [str(x) for x in (mw.get("tags") or [])]
-        if not _tags_match(rule_tags, device_tags):
+    for mw in rules.maintenance_windows:
+        if not mw.tags_match(tags):
             continue
-
-        start = _parse_iso(str(mw.get("start_ts", "")))
-        end = _parse_iso(str(mw.get("end_ts", "")))
-        if not start or not end:
+        if not mw.start or not mw.end:
             continue
-        if start <= now <= end:
-            return SilenceDecision(True, str(mw.get("reason", "maintenance")))
+        if mw.start <= now <= mw.end:
+            return SilenceDecision(True, mw.reason)
 
     return SilenceDecision(False, "")
+
+
+def suppression_checker(
+    cfg: Any,
+    device_tags: Dict[str, List[str]],
+    now: datetime,
+    severity: str = "critical",
+) -> Callable[[str, str], bool]:
+    """
+    is_suppressed(device_id, variable) memoised for one scan tick.
+
+    Build a new checker per tick (now is fixed) and hand it to expensive
+    analysis such as DiskMemoryPredictor so suppressed devices are skipped
+    before any work is done.
+    """
+    decisions: Dict[Tuple[str, str], bool] = {}
+
+    def check(device_id: str, variable: str) -> bool:
+        key = (device_id, variable)
+        hit = decisions.get(key)
+        if hit is None:
+            alert = {"variable": variable, "severity": severity}
+            hit = decisions[key] = is_suppressed(cfg, alert, device_tags.get(device_id) or [], now).suppressed
+        return hit
+
+    return check
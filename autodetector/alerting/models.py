@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple, Union
+
+from autodetector._compat import DATACLASS_SLOTS
+
+# Fields pulled in one C-level call; alerts saved by the store carry all of
+# them, so the defaults merge only runs for partial dicts
+_ALERT_FIELDS = operator.itemgetter("id", "severity", "device_id", "variable", "alert_type", "message", "count")
+_ALERT_DEFAULTS: Dict[str, Any] = {
+    "id": "",
+    "severity": "",
+    "device_id": "",
+    "variable": "",
+    "alert_type": "",
+    "message": "",
+    "count": 1,
+}
+
+
+@dataclass(**DATACLASS_SLOTS)
+class NormalizedAlert:
+    """Typed view of an alert dict, with every field coerced to str/int once."""
+
+    id: str
+    severity: str
+    device_id: str
+    variable: str
+    alert_type: str
+    message: str
+    count: int
+
+
+def normalize_alert(a: Dict[str, Any]) -> NormalizedAlert:
+    try:
+        aid, sev, dev, var, atype, msg, count = _ALERT_FIELDS(a)
+    except KeyError:
+        aid, sev, dev, var, atype, msg, count = _ALERT_FIELDS({**_ALERT_DEFAULTS, **a})
+    return NormalizedAlert(str(aid or ""), str(sev), str(dev), str(var), str(atype), str(msg), int(count or 1))
+
+
+def variable_and_severity(alert: Union[NormalizedAlert, Dict[str, Any]]) -> Tuple[str, str]:
+    if isinstance(alert, NormalizedAlert):
+        return alert.variable, alert.severity
+    return str(alert.get("variable", "")), str(alert.get("severity", ""))
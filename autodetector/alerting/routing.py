@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Union
+
+from autodetector.alerting.models import NormalizedAlert, variable_and_severity
+from autodetector.alerting.rules import compile_alerting
 
 
 @dataclass(frozen=True)
@@ -10,30 +13,23 @@ class Route:
     channels: List[str]
 
 
-def _tags_match(rule_tags: List[str], device_tags: List[str]) -> bool:
-    if not rule_tags:
-        return True
-    s = set(t.lower() for t in (device_tags or []))
-    return any(rt.lower() in s for rt in rule_tags)
-
+def route_alert(cfg: Any, alert: Union[NormalizedAlert, Dict[str, Any]], device_tags: List[str]) -> Route:
+    rules = compile_alerting(cfg)
+    if not rules.routes:
+        return Route(contact_group="default", channels=["telegram"])
 
-def route_alert(cfg: Any, alert: Dict[str, Any], device_tags: List[str]) -> Route:
-    raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
-    acfg = raw_cfg.get("alerting") or {}
+    tags = rules.device_bits(device_tags)
+    var, sev = variable_and_severity(alert)
 
-    for r in (acfg.get("routes") or []):
-        if not _tags_match([str(x) for x in (r.get("tags") or [])], device_tags):
+    for r in rules.routes:
+        if not r.tags_match(tags):
             continue
-
-        variables = [str(x) for x in (r.get("variables") or [])]
-        if variables and str(alert.get("variable", "")) not in variables:
+        if r.variables and var not in r.variables:
             continue
-
-        severities = [str(x) for x in (r.get("severities") or [])]
-        if severities and str(alert.get("severity", "")) not in severities:
+        if r.severities and sev not in r.severities:
             continue
 
-        return Route(contact_group=str(r.get("contact_group", "default")), channels=[str(x) for x in (r.get("channels") or ["telegram"])])
+        return Route(contact_group=r.contact_group, channels=list(r.channels))
 
     return Route(contact_group="default", channels=["telegram"])
 
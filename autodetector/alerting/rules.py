@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import functools
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Bit 0 of every tag mask is reserved: devices always carry it and untagged
+# rules match on it, so "rule has no tags" needs no separate branch.
+_ANY_TAG = 1
+_DEVICE_BITS_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    tags: FrozenSet[str]
+    variables: FrozenSet[str]
+    severities: FrozenSet[str]
+    start: Optional[datetime]
+    end: Optional[datetime]
+    reason: str
+    contact_group: str
+    channels: Tuple[str, ...]
+    tag_bits: int = _ANY_TAG
+
+    def tags_match(self, device_bits: int) -> bool:
+        return bool(self.tag_bits & device_bits)
+
+
+@dataclass(frozen=True)
+class CompiledAlerting:
+    silences: Tuple[CompiledRule, ...]
+    maintenance_windows: Tuple[CompiledRule, ...]
+    routes: Tuple[CompiledRule, ...]
+    tag_masks: Dict[str, int] = field(default_factory=dict)
+    cooldowns: Dict[Any, int] = field(default_factory=dict)
+    default_cooldown: int = 300
+    escalations: Dict[Any, int] = field(default_factory=dict)
+    default_escalation: int = 0
+    _device_bits: Dict[Tuple[str, ...], int] = field(default_factory=dict, repr=False, compare=False)
+
+    def device_bits(self, device_tags: Optional[List[str]]) -> int:
+        """Tag mask of a device; tags no rule mentions contribute nothing."""
+        key = tuple(device_tags or ())
+        bits = self._device_bits.get(key)
+        if bits is None:
+            bits = _ANY_TAG
+            for t in key:
+                bits |= self.tag_masks.get(str(t).lower(), 0)
+            if len(self._device_bits) >= _DEVICE_BITS_CACHE_SIZE:
+                self._device_bits.clear()
+            self._device_bits[key] = bits
+        return bits
+
+    def cooldown_sec(self, severity: str) -> int:
+        return self.cooldowns.get(severity, self.default_cooldown)
+
+    def critical_after_n(self, alert_type: str) -> int:
+        return self.escalations.get(alert_type, self.default_escalation)
+
+
+_EMPTY = CompiledAlerting(silences=(), maintenance_windows=(), routes=())
+
+# Compiled rule sets keyed by id() of the "alerting" dict they came from. The
+# dict itself is kept in the entry so the id cannot be recycled while cached;
+# a config reload hands out a new dict and therefore a fresh compile.
+_CACHE: "OrderedDict[int, Tuple[Dict[str, Any], CompiledAlerting]]" = OrderedDict()
+_CACHE_SIZE = 8
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_iso(ts: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(ts)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def _tag_mask(tags: Iterable[str], tag_masks: Dict[str, int]) -> int:
+    bits = 0
+    for t in tags:
+        bit = tag_masks.get(t)
+        if bit is None:
+            bit = tag_masks[t] = 1 << (len(tag_masks) + 1)
+        bits |= bit
+    return bits or _ANY_TAG
+
+
+def _int_or(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _compile_rule(r: Dict[str, Any], default_reason: str, tag_masks: Dict[str, int]) -> CompiledRule:
+    tags = frozenset(str(x).lower() for x in (r.get("tags") or []))
+    return CompiledRule(
+        tags=tags,
+        variables=frozenset(str(x) for x in (r.get("variables") or [])),
+        severities=frozenset(str(x) for x in (r.get("severities") or [])),
+        start=_parse_iso(str(r.get("start_ts", ""))),
+        end=_parse_iso(str(r.get("end_ts", ""))),
+        reason=str(r.get("reason", default_reason)),
+        contact_group=str(r.get("contact_group", "default")),
+        channels=tuple(str(x) for x in (r.get("channels") or ["telegram"])),
+        tag_bits=_tag_mask(tags, tag_masks),
+    )
+
+
+def _compile_policies(acfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-severity cooldowns and per-alert-type escalation counts as int tables.
+
+    Entries that do not coerce to int fall back to the table default instead
+    of raising on every alert that hits them.
+    """
+    default_cooldown = _int_or(acfg.get("cooldown_sec", 300), 300)
+    pol = acfg.get("critical_after_n") or {}
+    default_escalation = _int_or(pol.get("default", 0) or 0, 0)
+    return {
+        "cooldowns": {k: _int_or(v, default_cooldown) for k, v in (acfg.get("cooldown_by_severity") or {}).items()},
+        "default_cooldown": default_cooldown,
+        "escalations": {k: _int_or(v or 0, default_escalation) for k, v in pol.items()},
+        "default_escalation": default_escalation,
+    }
+
+
+def compile_alerting(cfg: Any) -> CompiledAlerting:
+    """Silence, maintenance, route and cooldown/escalation rules of cfg, parsed once per config."""
+    raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
+    acfg = raw_cfg.get("alerting")
+    if not acfg:
+        return _EMPTY
+
+    entry = _CACHE.get(id(acfg))
+    if entry is not None and entry[0] is acfg:
+        _CACHE.move_to_end(id(acfg))
+        return entry[1]
+
+    # Each distinct rule tag gets one bit, so matching a device against a
+    # rule is a single integer AND. Python ints are unbounded, so configs
+    # with more than 63 distinct tags still work, just with wider masks.
+    tag_masks: Dict[str, int] = {}
+    compiled = CompiledAlerting(
+        silences=tuple(_compile_rule(s, "silenced", tag_masks) for s in (acfg.get("silences") or [])),
+        maintenance_windows=tuple(_compile_rule(mw, "maintenance", tag_masks) for mw in (acfg.get("maintenance_windows") or [])),
+        routes=tuple(_compile_rule(r, "", tag_masks) for r in (acfg.get("routes") or [])),
+        tag_masks=tag_masks,
+        **_compile_policies(acfg),
+    )
+    _CACHE[id(acfg)] = (acfg, compiled)
+    if len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return compiled
+
+
+def clear_rule_cache() -> None:
+    """Drop compiled rules; needed only after editing an alerting dict in place."""
+    _CACHE.clear()
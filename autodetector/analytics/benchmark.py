@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import itertools
 import json
-import statistics
+import math
+import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 
-@dataclass(frozen=True)
+from autodetector._compat import DATACLASS_SLOTS
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class BenchmarkResult:
     device_id: str
     metric_name: str
@@ -21,9 +28,27 @@ class BenchmarkResult:
     unit: str
 
 
+# Whole UTC second last formatted by _fast_utc_iso and its "YYYY-MM-DDTHH:MM:SS" text
+_iso_second: Tuple[int, str] = (-1, "")
+
+
+def _fast_utc_iso() -> str:
+    """Same as datetime.now(timezone.utc).isoformat(); the date part is formatted once per second."""
+    global _iso_second
+    ns = time.time_ns()
+    sec, micros = divmod(ns // 1000, 1_000_000)
+    cached = _iso_second
+    if cached[0] != sec:
+        cached = _iso_second = (sec, datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"))
+    return f"{cached[1]}.{micros:06d}+00:00"
+
+
 class PerformanceBenchmark:
     """Benchmark and baseline performance metrics for devices."""
     
+    # Results kept per device/metric; older ones are dropped as new ones arrive
+    MAX_HISTORY = 1024
+    
     COMMON_BENCHMARKS = {
         "cpu_response_time": {
             "description": "CPU metric collection response time",
@@ -48,7 +73,7 @@ class PerformanceBenchmark:
     }
     
     def __init__(self):
-        self.results: Dict[str, List[BenchmarkResult]] = {}
+        self.results: Dict[str, Deque[BenchmarkResult]] = {}
         self.baselines: Dict[str, BenchmarkResult] = {}
     
     def run_benchmark(
@@ -63,16 +88,16 @@ class PerformanceBenchmark:
             raise ValueError("No samples provided")
         
         # Calculate statistics
-        avg_val = statistics.mean(samples)
-        min_val = min(samples)
-        max_val = max(samples)
-        p95_val = self._percentile(samples, 95)
-        p99_val = self._percentile(samples, 99)
+        arr = np.asarray(samples, dtype=np.float64)
+        avg_val = float(arr.mean())
+        min_val = float(arr.min())
+        max_val = float(arr.max())
+        p95_val, p99_val = self._percentiles(arr, (95, 99))
         
         result = BenchmarkResult(
             device_id=device_id,
             metric_name=metric_name,
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp=_fast_utc_iso(),
             samples=len(samples),
             min_val=round(min_val, 4),
             max_val=round(max_val, 4),
@@ -84,24 +109,32 @@ class PerformanceBenchmark:
         
         # Store result
         key = f"{device_id}:{metric_name}"
-        if key not in self.results:
-            self.results[key] = []
-        self.results[key].append(result)
+        history = self.results.get(key)
+        if history is None:
+            history = self.results[key] = deque(maxlen=self.MAX_HISTORY)
+        history.append(result)
         
         return result
     
-    def _percentile(self, data: List[float], percentile: int) -> float:
-        """Calculate percentile value."""
-        sorted_data = sorted(data)
-        index = (percentile / 100) * (len(sorted_data) - 1)
-        lower = int(index)
-        upper = min(lower + 1, len(sorted_data) - 1)
-        
-        if lower == upper:
-            return sorted_data[lower]
+    @staticmethod
+    def _percentiles(data: np.ndarray, percentiles: Sequence[float]) -> List[float]:
+        """
+        Linearly interpolated percentiles from one partial sort.
         
+        np.partition places only the ranks the percentiles need, which is
+        O(n) instead of sorting the whole sample once per percentile.
+        """
+        index = np.asarray(percentiles, dtype=np.float64) / 100 * (data.size - 1)
+        lower = np.floor(index).astype(np.intp)
+        upper = np.minimum(lower + 1, data.size - 1)
         weight = index - lower
-        return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
+        
+        part = np.partition(data, np.unique(np.concatenate([lower, upper])))
+        return (part[lower] * (1 - weight) + part[upper] * weight).tolist()
+    
+    def _percentile(self, data: List[float], percentile: int) -> float:
+        """Calculate percentile value."""
+        return self._percentiles(np.asarray(data, dtype=np.float64), (percentile,))[0]
     
     def set_baseline(
         self,
@@ -162,7 +195,7 @@ class PerformanceBenchmark:
     ) -> Dict[str, Any]:
         """Analyze trend over time for a metric."""
         key = f"{device_id}:{metric_name}"
-        results = self.results.get(key, [])
+        results = self.results.get(key) or ()
         
         if len(results) < 2:
             return {
@@ -170,13 +203,16 @@ class PerformanceBenchmark:
                 "message": f"Need at least 2 samples, have {len(results)}",
             }
         
-        # Take last N results
-        recent = results[-window:]
-        avgs = [r.avg_val for r in recent]
+        # Take last N results; a non-positive window means all of them
+        start = max(0, len(results) - window) if window > 0 else 0
+        avgs = [r.avg_val for r in itertools.islice(results, start, None)]
         
         # Simple trend analysis
-        first_half = statistics.mean(avgs[:len(avgs)//2])
-        second_half = statistics.mean(avgs[len(avgs)//2:])
+        half = len(avgs) // 2
+        first_sum = math.fsum(avgs[:half])
+        second_sum = math.fsum(avgs[half:])
+        first_half = first_sum / half
+        second_half = second_sum / (len(avgs) - half)
         
         trend = "stable"
         if second_half > first_half * 1.1:
@@ -186,11 +222,11 @@ class PerformanceBenchmark:
         
         return {
             "sufficient_data": True,
-            "samples": len(recent),
+            "samples": len(avgs),
             "trend": trend,
             "first_half_avg": round(first_half, 4),
             "second_half_avg": round(second_half, 4),
-            "overall_avg": round(statistics.mean(avgs), 4),
+            "overall_avg": round((first_sum + second_sum) / len(avgs), 4),
         }
 
 
@@ -214,17 +250,21 @@ class CapacityPlanner:
                 "message": "Need at least 3 data points for forecasting",
             }
         
-        # Simple linear regression
+        # Simple linear regression over time indices 0..n-1; their sums are
+        # closed-form, so only sum(y) and sum(x*y) touch the data
         n = len(historical_data)
-        x = list(range(n))  # Time indices
-        y = [point[1] for point in historical_data]
+        y = np.fromiter((point[1] for point in historical_data), dtype=np.float64, count=n)
+        sx = n * (n - 1) / 2
+        sxx = (n - 1) * n * (2 * n - 1) / 6
+        sy = float(y.sum())
+        sxy = float(np.arange(n, dtype=np.float64) @ y)
         
-        x_mean = statistics.mean(x)
-        y_mean = statistics.mean(y)
+        x_mean = sx / n
+        y_mean = sy / n
         
         # Calculate slope
-        numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
+        numerator = sxy - sx * y_mean
+        denominator = sxx - sx * x_mean
         
         if denominator == 0:
             slope = 0
@@ -235,25 +275,16 @@ class CapacityPlanner:
         
         # Forecast future values
         last_x = n - 1
-        forecast_values = []
-        for i in range(forecast_days):
-            forecast_x = last_x + i
-            forecast_y = slope * forecast_x + intercept
-            forecast_values.append(max(0.0, min(100.0, forecast_y)))
+        forecast_values = np.clip(slope * np.arange(last_x, last_x + forecast_days) + intercept, 0.0, 100.0)
         
-        # Find when we hit critical thresholds
+        # Find when we hit critical thresholds (first crossing day, if any)
         critical_threshold = 90.0
         warning_threshold = 80.0
         
-        days_to_critical = None
-        days_to_warning = None
-        
-        for i, val in enumerate(forecast_values):
-            if days_to_warning is None and val >= warning_threshold:
-                days_to_warning = i
-            if days_to_critical is None and val >= critical_threshold:
-                days_to_critical = i
-                break
+        warning_hits = np.flatnonzero(forecast_values >= warning_threshold)
+        critical_hits = np.flatnonzero(forecast_values >= critical_threshold)
+        days_to_warning = int(warning_hits[0]) if warning_hits.size else None
+        days_to_critical = int(critical_hits[0]) if critical_hits.size else None
         
         forecast_key = f"{device_id}:{resource_type}"
         result = {
@@ -261,11 +292,11 @@ class CapacityPlanner:
             "resource_type": resource_type,
             "sufficient_data": True,
             "slope_per_day": round(slope, 4),
-            "current_avg": round(y[-1], 2),
+            "current_avg": round(float(y[-1]), 2),
             "forecast_horizon_days": forecast_days,
             "days_to_warning": days_to_warning,
             "days_to_critical": days_to_critical,
-            "forecast_generated_at": datetime.now(timezone.utc).isoformat(),
+            "forecast_generated_at": _fast_utc_iso(),
         }
         
         self.forecasts[forecast_key] = result
@@ -1,16 +1,38 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
+from autodetector._compat import DATACLASS_SLOTS
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class DetectedIssue:
     issue_type: str
     severity: str
     summary: str
     evidence: List[str]
-    recommended_actions: List[str]
+    # Shared module-level tuples; treat as read-only
+    recommended_actions: Sequence[str]
+
+
+# One alternative per issue kind; a message can match more than one.
+_ERR_RE = re.compile(r"(?P<timeout>timed out)|(?P<auth>auth)|(?P<refused>refused)", re.IGNORECASE)
+
+_TIMEOUT_ACTIONS = (
+    "Verify IP/host is reachable from the NOC runner (ping/route).",
+    "Verify port is reachable (22 for SSH / 23 for Telnet).",
+    "Increase collector connect_timeout_sec/command_timeout_sec if links are slow.",
+)
+_AUTH_ACTIONS = (
+    "Verify username/password or SSH key for the device.",
+    "If using credential_ref/vault_file, confirm the reference exists and is correct.",
+)
+_REFUSED_ACTIONS = (
+    "Confirm SSH/Telnet is enabled on the device.",
+    "Confirm the transport port is open and not blocked by host firewall.",
+)
 
 
 def _flatten_errors(scan_results: Dict[str, Any]) -> List[str]:
@@ -29,9 +51,11 @@ def detect_issues_from_scan(scan_results: Dict[str, Any]) -> List[DetectedIssue]
     if not errors:
         return issues
 
-    timeouts = [e for e in errors if "timed out" in str(e).lower()]
-    auth = [e for e in errors if "auth" in str(e).lower() or "authentication" in str(e).lower()]
-    refused = [e for e in errors if "refused" in str(e).lower()]
+    buckets: Dict[str, List[str]] = {"timeout": [], "auth": [], "refused": []}
+    for e in errors:
+        for kind in {m.lastgroup for m in _ERR_RE.finditer(e)}:
+            buckets[kind].append(e)
+    timeouts, auth, refused = buckets["timeout"], buckets["auth"], buckets["refused"]
 
     if timeouts:
         issues.append(
@@ -40,11 +64,7 @@ def detect_issues_from_scan(scan_results: Dict[str, Any]) -> List[DetectedIssue]
                 severity="critical",
                 summary="SSH/Telnet collection timed out; device likely unreachable or blocked by firewall/ACL.",
                 evidence=timeouts[:10],
-                recommended_actions=[
-                    "Verify IP/host is reachable from the NOC runner (ping/route).",
-                    "Verify port is reachable (22 for SSH / 23 for Telnet).",
-                    "Increase collector connect_timeout_sec/command_timeout_sec if links are slow.",
-                ],
+                recommended_actions=_TIMEOUT_ACTIONS,
             )
         )
 
@@ -55,10 +75,7 @@ def detect_issues_from_scan(scan_results: Dict[str, Any]) -> List[DetectedIssue]
                 severity="critical",
                 summary="Authentication failures detected; credentials/enable secrets may be wrong.",
                 evidence=auth[:10],
-                recommended_actions=[
-                    "Verify username/password or SSH key for the device.",
-                    "If using credential_ref/vault_file, confirm the reference exists and is correct.",
-                ],
+                recommended_actions=_AUTH_ACTIONS,
             )
         )
 
@@ -69,10 +86,7 @@ def detect_issues_from_scan(scan_results: Dict[str, Any]) -> List[DetectedIssue]
                 severity="critical",
                 summary="TCP connection refused; SSH/Telnet service may be down or port incorrect.",
                 evidence=refused[:10],
-                recommended_actions=[
-                    "Confirm SSH/Telnet is enabled on the device.",
-                    "Confirm the transport port is open and not blocked by host firewall.",
-                ],
+                recommended_actions=_REFUSED_ACTIONS,
             )
         )
 
@@ -6,6 +6,11 @@ from typing import Any, Dict, List, Optional
 
 from autodetector.ai.llm import LLMRegistry
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 
 @dataclass
 class AssistantConfig:
@@ -22,6 +27,18 @@ class AssistantResponse:
     metadata: Dict[str, Any]
 
 
+def _prompt_json(data: Any) -> str:
+    """Compact JSON for the model: no indentation, which only costs tokens.
+
+    Keys stay sorted so the same input always renders to the same prompt.
+    """
+    if orjson is not None:
+        opts = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        return orjson.dumps(data, default=str, option=opts).decode()
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
 def generate_assistant_response(
     cfg: AssistantConfig,
     instruction: str,
@@ -37,7 +54,7 @@ def generate_assistant_response(
     elif isinstance(input_data, str):
         input_text = input_data
     else:
-        input_text = json.dumps(input_data, indent=2, sort_keys=True, default=str)
+        input_text = _prompt_json(input_data)
 
     prompt = model.format_prompt(
         instruction=instruction,
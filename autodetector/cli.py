@@ -20,9 +20,22 @@ from autodetector.storage.sqlite_store import SqliteStore
 from cli.commands.llm_commands import add_llm_subparser, handle_llm_command
 from cli.commands.assistant_commands import add_assistant_subparser, handle_assistant_command
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 
 console = Console()
 
+# Datetimes and dataclasses go through default=str like they do with json.dumps
+_ORJSON_OPTS = (
+    (orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+     | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+    if orjson is not None
+    else 0
+)
+
 
 def _env_or_value(v: str) -> str:
     if isinstance(v, str) and v.startswith("${") and v.endswith("}"):
@@ -31,6 +44,41 @@ def _env_or_value(v: str) -> str:
     return v
 
 
+def _json_bytes(obj) -> bytes:
+    """Indented, key-sorted JSON; orjson when installed, json.dumps otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=_ORJSON_OPTS)
+    return json.dumps(obj, indent=2, sort_keys=True, default=str).encode("utf-8")
+
+
+def _stream_scan_json(results, out) -> None:
+    """Write scan results to a binary stream, one device at a time.
+
+    Produces the same text as dumping the whole dict with indent=2 and sorted
+    keys, but only a single device is ever held serialized in memory.
+    """
+    keys = sorted(results)
+    if not keys:
+        out.write(b"{}\n")
+        return
+
+    out.write(b"{")
+    for n, key in enumerate(keys):
+        out.write(b"\n  " if n == 0 else b",\n  ")
+        out.write(_json_bytes(key) + b": ")
+        value = results[key]
+        if key == "devices" and isinstance(value, list) and value:
+            out.write(b"[")
+            for i, device in enumerate(value):
+                out.write(b"\n    " if i == 0 else b",\n    ")
+                # Newlines in encoded JSON are layout only; strings escape theirs
+                out.write(_json_bytes(device).replace(b"\n", b"\n    "))
+            out.write(b"\n  ]")
+        else:
+            out.write(_json_bytes(value).replace(b"\n", b"\n  "))
+    out.write(b"\n}\n")
+
+
 def main(argv=None):
     parser = argparse.ArgumentParser(prog="nocctl", description="1CNG_NOC_AutoDetector CLI")
     parser.add_argument("--config", required=True, help="Path to YAML config")
@@ -99,7 +147,13 @@ def main(argv=None):
         now = datetime.now(timezone.utc)
         results = run_poll_once(cfg, store, now=now, deep=args.deep)
         if args.json:
-            console.print_json(json.dumps(results, indent=2, sort_keys=True, default=str))
+            if sys.stdout.isatty():
+                console.print_json(data=results, sort_keys=True, default=str)
+            else:
+                # Plain JSON for pipes and files, skipping Rich's highlighting pass
+                sys.stdout.flush()
+                _stream_scan_json(results, sys.stdout.buffer)
+                sys.stdout.buffer.flush()
         else:
             table = Table(title="Poll Results")
             table.add_column("Device")
@@ -147,7 +201,7 @@ def main(argv=None):
     if args.cmd == "report":
         now = datetime.now(timezone.utc)
         out = generate_reports(cfg, store, now=now, range_name=args.range_)
-        console.print_json(json.dumps(out, indent=2, sort_keys=True, default=str))
+        console.print_json(data=out, sort_keys=True, default=str)
         return
 
     if args.cmd == "help":
@@ -168,7 +222,7 @@ def main(argv=None):
 
     if args.cmd == "detect-os":
         guess = detect_os(host=args.host, transport=args.transport, username=args.username, password=args.password)
-        console.print_json(json.dumps(guess, indent=2, sort_keys=True, default=str))
+        console.print_json(data=guess, sort_keys=True, default=str)
         return
 
     if args.cmd == "plugin":
@@ -183,7 +237,7 @@ def main(argv=None):
 
         if args.plugin_cmd == "validate":
             out = validate_plugin(args.os)
-            console.print_json(json.dumps(out, indent=2, sort_keys=True, default=str))
+            console.print_json(data=out, sort_keys=True, default=str)
             return
 
         if args.plugin_cmd == "init":
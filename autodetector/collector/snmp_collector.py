@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from pysnmp.hlapi.v3arch.asyncio import *
 from pysnmp.smi.rfc1902 import ObjectIdentity
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import asyncio
+import time
 
 
 class SNMPCollector:
@@ -19,53 +20,77 @@ class SNMPCollector:
         "ifNumber": "1.3.6.1.2.1.2.1.0",
     }
     
+    # IF-MIB::ifTable entry and the columns we keep from it, with the Python
+    # type each value is converted to
+    IF_TABLE_OID = "1.3.6.1.2.1.2.2.1"
+    IF_TABLE_COLUMNS = {
+        1: ("ifIndex", int),
+        2: ("ifDescr", str),
+        3: ("ifType", int),
+        5: ("ifSpeed", int),
+        8: ("ifOperStatus", int),
+    }
+    
     def __init__(self, community: str = "public", version: int = 2):
         self.community = community
         self.version = version
     
-    async def get_device_info(self, host: str, port: int = 161) -> Dict[str, Any]:
-        """Get basic device info via SNMP."""
-        result = {}
+    async def get_device_info(
+        self,
+        host: str,
+        port: int = 161,
+        *,
+        engine: Optional[SnmpEngine] = None,
+        target: Optional[UdpTransportTarget] = None,
+    ) -> Dict[str, Any]:
+        """Get basic device info via SNMP.
         
-        for name, oid in self.COMMON_OIDS.items():
-            try:
-                iterator = getCmd(
-                    SnmpEngine(),
-                    CommunityData(self.community),
-                    await UdpTransportTarget.create((host, port)),
-                    ContextData(),
-                    ObjectType(ObjectIdentity(oid))
-                )
-                
-                errorIndication, errorStatus, errorIndex, varBinds = await iterator
-                
-                if errorIndication:
-                    result[name] = None
-                elif errorStatus:
-                    result[name] = None
-                else:
-                    for varBind in varBinds:
-                        result[name] = str(varBind[1])
-            except Exception as e:
-                result[name] = None
+        All COMMON_OIDS go out as varbinds of a single GET PDU, so this is one
+        round trip per device rather than one per OID.
+        """
+        names = list(self.COMMON_OIDS)
+        result: Dict[str, Any] = dict.fromkeys(names)
+        
+        try:
+            errorIndication, errorStatus, errorIndex, varBinds = await getCmd(
+                engine or SnmpEngine(),
+                CommunityData(self.community),
+                target or await UdpTransportTarget.create((host, port)),
+                ContextData(),
+                *[ObjectType(ObjectIdentity(oid)) for oid in self.COMMON_OIDS.values()]
+            )
+            
+            if not errorIndication and not errorStatus:
+                # Responses come back in request order
+                for name, varBind in zip(names, varBinds):
+                    result[name] = str(varBind[1])
+        except Exception as e:
+            for name in names:
                 result[f"{name}_error"] = str(e)
         
         return result
     
-    async def get_interface_table(self, host: str, port: int = 161) -> List[Dict[str, Any]]:
+    async def get_interface_table(
+        self,
+        host: str,
+        port: int = 161,
+        *,
+        engine: Optional[SnmpEngine] = None,
+        target: Optional[UdpTransportTarget] = None,
+    ) -> List[Dict[str, Any]]:
         """Get interface table via SNMP."""
-        interfaces = []
-        
-        # IF-MIB::ifTable
-        oid_prefix = "1.3.6.1.2.1.2.2.1"
+        by_index: Dict[int, Dict[str, Any]] = {}
         
         try:
-            iterator = nextCmd(
-                SnmpEngine(),
+            # GETBULK pulls up to 25 rows per PDU instead of one per GETNEXT
+            iterator = bulkWalkCmd(
+                engine or SnmpEngine(),
                 CommunityData(self.community),
-                await UdpTransportTarget.create((host, port)),
+                target or await UdpTransportTarget.create((host, port)),
                 ContextData(),
-                ObjectType(ObjectIdentity(oid_prefix)),
+                0,
+                25,
+                ObjectType(ObjectIdentity(self.IF_TABLE_OID)),
                 lexicographicMode=False
             )
             
@@ -73,41 +98,48 @@ class SNMPCollector:
                 if errorIndication or errorStatus:
                     break
                 
-                iface_data = {}
                 for varBind in varBinds:
-                    oid_str = str(varBind[0])
-                    value = str(varBind[1])
-                    
-                    if "2.1" in oid_str:
-                        iface_data["ifIndex"] = value
-                    elif "2.2" in oid_str:
-                        iface_data["ifDescr"] = value
-                    elif "2.3" in oid_str:
-                        iface_data["ifType"] = value
-                    elif "2.5" in oid_str:
-                        iface_data["ifSpeed"] = value
-                    elif "2.8" in oid_str:
-                        iface_data["ifOperStatus"] = value
-                
-                if iface_data:
-                    interfaces.append(iface_data)
+                    # ifTable instances are 1.3.6.1.2.1.2.2.1.<column>.<ifIndex>
+                    oid_tuple = varBind[0].asTuple()
+                    column = self.IF_TABLE_COLUMNS.get(oid_tuple[-2])
+                    if column is not None:
+                        field, convert = column
+                        by_index.setdefault(oid_tuple[-1], {})[field] = convert(varBind[1])
                     
         except Exception as e:
             return [{"error": str(e)}]
         
-        return interfaces
+        return list(by_index.values())
     
-    async def discover_via_snmp(self, host: str, port: int = 161) -> Dict[str, Any]:
+    async def discover_via_snmp(
+        self,
+        host: str,
+        port: int = 161,
+        *,
+        engine: Optional[SnmpEngine] = None,
+    ) -> Dict[str, Any]:
         """Full SNMP discovery of a device."""
-        info = await self.get_device_info(host, port)
-        interfaces = await self.get_interface_table(host, port)
+        engine = engine or SnmpEngine()
+        try:
+            target = await UdpTransportTarget.create((host, port))
+        except Exception:
+            # Leave it to the queries below to hit and report the same error
+            target = None
+        
+        # Independent requests; the engine matches responses by request-id,
+        # so both can be in flight on it at once
+        info, interfaces = await asyncio.gather(
+            self.get_device_info(host, port, engine=engine, target=target),
+            self.get_interface_table(host, port, engine=engine, target=target),
+        )
         
         return {
             "host": host,
             "snmp_community": self.community,
             "device_info": info,
             "interfaces": interfaces,
-            "discovered_at": asyncio.get_event_loop().time(),
+            # Same monotonic clock the event loop's time() reads
+            "discovered_at": time.monotonic(),
         }
 
 
@@ -117,12 +149,14 @@ class SNMPDiscoveryScanner:
     def __init__(self, community: str = "public", timeout_sec: float = 2.0):
         self.collector = SNMPCollector(community=community)
         self.timeout_sec = timeout_sec
+        # One engine for every host in a scan; building it per host is costly
+        self.engine = SnmpEngine()
     
     async def scan_host(self, host: str) -> Optional[Dict[str, Any]]:
         """Scan a single host via SNMP."""
         try:
             result = await asyncio.wait_for(
-                self.collector.discover_via_snmp(host),
+                self.collector.discover_via_snmp(host, engine=self.engine),
                 timeout=self.timeout_sec
             )
             
@@ -136,14 +170,26 @@ class SNMPDiscoveryScanner:
             return {"host": host, "error": str(e)}
     
     async def scan_range(self, hosts: List[str], max_concurrent: int = 50) -> List[Dict[str, Any]]:
-        """Scan a list of hosts concurrently."""
+        """Scan a list of hosts concurrently.
+        
+        Hosts are scheduled in chunks of a few times max_concurrent, so a /16
+        never has tens of thousands of coroutines alive at once. Results come
+        back in host order.
+        """
         semaphore = asyncio.Semaphore(max_concurrent)
         
-        async def scan_with_limit(host: str) -> Optional[Dict[str, Any]]:
+        async def scan_with_limit(index: int, host: str) -> Tuple[int, Optional[Dict[str, Any]]]:
             async with semaphore:
-                return await self.scan_host(host)
+                return index, await self.scan_host(host)
         
-        tasks = [scan_with_limit(h) for h in hosts]
-        results = await asyncio.gather(*tasks)
+        found: List[Tuple[int, Dict[str, Any]]] = []
+        chunk_size = max_concurrent * 4
+        for start in range(0, len(hosts), chunk_size):
+            chunk = hosts[start:start + chunk_size]
+            for next_done in asyncio.as_completed([scan_with_limit(i, h) for i, h in enumerate(chunk, start)]):
+                index, result = await next_done
+                if result is not None:
+                    found.append((index, result))
         
-        return [r for r in results if r is not None]
+        found.sort(key=lambda item: item[0])
+        return [result for _, result in found]
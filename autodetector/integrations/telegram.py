@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Any
+import atexit
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 
 import requests
@@ -8,13 +13,63 @@ import requests
 
 logger = logging.getLogger(__name__)
 
+_MAX_WORKERS = 8
+# Longest Telegram "retry_after" (seconds) honoured before giving up on a message
+_MAX_RETRY_AFTER = 30
 
-def send_telegram_message(cfg: Any, text: str) -> None:
+# One keep-alive session per thread, since requests.Session is not
+# thread-safe. Batches go through a single long-lived pool, so its worker
+# threads and their sessions (and open connections) carry over from one
+# dispatch to the next instead of paying a TCP/TLS handshake every time.
+_local = threading.local()
+_sessions: "weakref.WeakSet[requests.Session]" = weakref.WeakSet()
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        with _pool_lock:
+            _sessions.add(session)
+    return session
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="telegram")
+        return _pool
+
+
+@atexit.register
+def _close_sessions() -> None:
+    with _pool_lock:
+        pool, sessions = _pool, list(_sessions)
+    if pool is not None:
+        pool.shutdown(wait=True)
+    for session in sessions:
+        session.close()
+
+
+def _telegram_cfg(cfg: Any) -> Dict[str, Any]:
     raw_cfg = cfg.raw if hasattr(cfg, "raw") else cfg
-    tcfg = ((raw_cfg.get("integrations") or {}).get("telegram") or {})
+    return ((raw_cfg.get("integrations") or {}).get("telegram") or {})
+
+
+def send_telegram_message(cfg: Any, text: str, chat_id: Optional[str] = None, bot_token: Optional[str] = None) -> None:
+    """Send text via the Telegram bot; chat_id/bot_token override the configured ones."""
+    if chat_id is None or bot_token is None:
+        tcfg = _telegram_cfg(cfg)
+        if chat_id is None:
+            chat_id = tcfg.get("chat_id", "")
+        if bot_token is None:
+            bot_token = tcfg.get("bot_token", "")
 
-    bot_token = str(tcfg.get("bot_token", ""))
-    chat_id = str(tcfg.get("chat_id", ""))
+    bot_token = str(bot_token or "")
+    chat_id = str(chat_id or "")
     if not bot_token or not chat_id:
         logger.debug("Telegram not configured (missing bot_token/chat_id). Message not sent.")
         return
@@ -22,9 +77,51 @@ def send_telegram_message(cfg: Any, text: str) -> None:
     url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
     payload = {"chat_id": chat_id, "text": text}
     try:
-        r = requests.post(url, json=payload, timeout=10)
+        r = _session().post(url, json=payload, timeout=10)
+        if r.status_code == 429:
+            # Rate limited: wait as told and retry once rather than drop it
+            try:
+                retry_after = int(r.json().get("parameters", {}).get("retry_after", 1))
+            except Exception:  # noqa: BLE001
+                retry_after = 1
+            if retry_after <= _MAX_RETRY_AFTER:
+                time.sleep(retry_after)
+                r = _session().post(url, json=payload, timeout=10)
         if r.status_code >= 400:
             logger.warning("Telegram send failed: HTTP %s: %s", r.status_code, (r.text or "")[:200])
     except Exception as e:  # noqa: BLE001
         logger.warning("Telegram send failed: %s", e)
         return
+
+
+def _send_chat(cfg: Any, chat_id: str, texts: List[str]) -> None:
+    for text in texts:
+        send_telegram_message(cfg, text, chat_id=chat_id)
+
+
+def send_telegram_messages(cfg: Any, messages: List[Tuple[Optional[str], str]]) -> None:
+    """
+    Send (chat_id, text) pairs, in order per chat and concurrently across chats.
+
+    A chat_id of None means the configured default chat. Each chat gets its
+    messages in list order, so follow-ups (repeats, escalations) never
+    overtake the alert they refer to; distinct chats are sent concurrently
+    so their round trips overlap. Returns once every message has been sent.
+    """
+    if not messages:
+        return
+
+    default_chat = str(_telegram_cfg(cfg).get("chat_id") or "")
+    by_chat: Dict[str, List[str]] = {}
+    for chat_id, text in messages:
+        by_chat.setdefault(default_chat if chat_id is None else str(chat_id), []).append(text)
+
+    if len(by_chat) == 1:
+        (chat_id, texts), = by_chat.items()
+        _send_chat(cfg, chat_id, texts)
+        return
+
+    pool = _executor()
+    futures = [pool.submit(_send_chat, cfg, chat_id, texts) for chat_id, texts in by_chat.items()]
+    for future in futures:
+        future.result()
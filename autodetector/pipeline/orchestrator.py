@@ -10,8 +10,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import yaml
 
 from autodetector.ai.detectors import analyze_device
-from autodetector.alerting.engine import build_dedupe_key, should_emit_alert
+from autodetector.alerting.engine import build_dedupe_key, record_alert_emitted, should_emit_alert
 from autodetector.alerting.dispatcher import dispatch_alerts
+from autodetector.alerting.rules import compile_alerting
 from autodetector.collector.ssh_collector import SshCollector
 from autodetector.collector.telnet_collector import TelnetCollector
 from autodetector.config import AppConfig, DeviceConfig
@@ -152,7 +153,6 @@ def _poll_one_device(cfg: AppConfig, store: SqliteStore, device: DeviceConfig, n
 def run_poll_once(cfg: AppConfig, store: SqliteStore, now: datetime, deep: bool = False) -> Dict[str, Any]:
     results: Dict[str, Any] = {"ts": now.isoformat(), "devices": []}
 
-    cooldown_sec = int((cfg.raw.get("alerting") or {}).get("cooldown_sec", 300))
     dedupe_fields = (cfg.raw.get("alerting") or {}).get("dedupe_key_fields") or ["device_id", "variable", "alert_type"]
 
     all_alerts: List[Dict[str, Any]] = []
@@ -234,9 +234,10 @@ def run_poll_once(cfg: AppConfig, store: SqliteStore, now: datetime, deep: bool
                 a["device_id"] = device.id
                 a["dedupe_key"] = build_dedupe_key(a, dedupe_fields)
 
-                sev_cd = int(((cfg.raw.get("alerting") or {}).get("cooldown_by_severity") or {}).get(str(a.get("severity", "")), cooldown_sec))
+                sev_cd = compile_alerting(cfg).cooldown_sec(str(a.get("severity", "")))
                 if should_emit_alert(store, a, cooldown_sec=sev_cd):
                     saved = store.upsert_alert(a)
+                    record_alert_emitted(store, a)
                     emitted_alerts.append(saved)
                     all_alerts.append(saved)
 
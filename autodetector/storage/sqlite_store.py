@@ -288,6 +288,14 @@ class SqliteStore:
             cur = conn.execute("SELECT * FROM alerts ORDER BY ts DESC LIMIT ?", (limit,))
             return [dict(r) for r in cur.fetchall()]
 
+    def get_alert_by_dedupe_key(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM alerts WHERE dedupe_key = ? ORDER BY last_seen_ts DESC LIMIT 1",
+                (dedupe_key,),
+            ).fetchone()
+            return dict(row) if row else None
+
     def list_alerts_since(self, since_ts: str, limit: int = 5000) -> List[Dict[str, Any]]:
         with self._connect() as conn:
             cur = conn.execute(
@@ -314,6 +322,19 @@ class SqliteStore:
                     (str(uuid.uuid4()), ts, alert_id, action, actor, note),
                 )
 
+    def insert_alert_events_bulk(self, rows: List[Tuple[str, str, str, str]]) -> None:
+        """Insert (alert_id, action, actor, note) rows in a single transaction."""
+        ts = datetime.now(timezone.utc).isoformat()
+        params = [(str(uuid.uuid4()), ts, alert_id, action, actor, note) for alert_id, action, actor, note in rows if alert_id]
+        if not params:
+            return
+        with self._write_lock:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO alert_events(id, ts, alert_id, action, actor, note) VALUES(?, ?, ?, ?, ?, ?)",
+                    params,
+                )
+
     def set_device_state(self, device_id: str, last_seen_ts: str, health_score: float, snapshot: Dict[str, Any]) -> None:
         with self._write_lock:
             with self._connect() as conn:
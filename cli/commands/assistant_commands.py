@@ -3,6 +3,7 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+from dataclasses import asdict
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
@@ -95,7 +96,7 @@ def _cmd_explain_scan(args, scan: Dict[str, Any]) -> int:
     issues = detect_issues_from_scan(scan)
     prompt_data = {
         "scan": summarize_scan_for_prompt(scan),
-        "detected_issues": [i.__dict__ for i in issues],
+        "detected_issues": [asdict(i) for i in issues],
     }
 
     cfg = AssistantConfig(model_name=args.model, system_prompt=args.system)
@@ -115,7 +116,7 @@ def _cmd_voice_call(args, app_cfg: Any, scan: Dict[str, Any]) -> int:
     issues = detect_issues_from_scan(scan)
     prompt_data = {
         "scan": summarize_scan_for_prompt(scan),
-        "detected_issues": [i.__dict__ for i in issues],
+        "detected_issues": [asdict(i) for i in issues],
     }
 
     cfg = AssistantConfig(model_name=args.model, system_prompt=args.system, max_tokens=256, temperature=0.2)
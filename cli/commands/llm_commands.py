@@ -77,7 +77,7 @@ def add_llm_subparser(subparsers):
     train_parser.add_argument("--architecture", default="gpt",
                              choices=["gpt", "claude", "gemini"])
     train_parser.add_argument("--method", default="lora",
-                             choices=["lora", "qlora", "full"])
+                             choices=["lora", "qlora", "full", "auto"])
     train_parser.add_argument("--data-path", help="Training data path")
     train_parser.add_argument("--epochs", type=int, default=3)
     train_parser.add_argument("--batch-size", type=int, default=4)
@@ -92,6 +92,8 @@ def add_llm_subparser(subparsers):
     dataset_parser.add_argument("--eval-count", type=int, default=200)
     dataset_parser.add_argument("--format", default="jsonl",
                                choices=["jsonl", "alpaca", "sharegpt", "all"])
+    dataset_parser.add_argument("--workers", type=int, default=1,
+                               help="Worker processes for example generation")
     
     # Benchmark command
     benchmark_parser = llm_subparsers.add_parser("benchmark", help="Benchmark model performance")
@@ -309,6 +311,7 @@ def _cmd_dataset(args) -> int:
         train_count=args.train_count,
         eval_count=args.eval_count,
         formats=formats,
+        workers=args.workers,
     )
     
     print(f"\n✓ Dataset generated")